@@ -1,12 +1,22 @@
 import os
-from typing import List
-from dataclasses import dataclass
+import functools
+from typing import FrozenSet, Optional, Tuple
+from dataclasses import dataclass, field
+
+
+@functools.lru_cache(maxsize=None)
+def _env(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Read an environment variable once and cache it for the process lifetime"""
+    return os.getenv(key, default)
+
 
 @dataclass
 class BybitConfig:
-    api_key: str = os.getenv("BYBIT_API_KEY", "")
-    api_secret: str = os.getenv("BYBIT_API_SECRET", "")
-    testnet: bool = os.getenv("BYBIT_TESTNET", "false").lower() == "true"
+    api_key: str = _env("BYBIT_API_KEY", "")
+    api_secret: str = _env("BYBIT_API_SECRET", "")
+    testnet: bool = _env("BYBIT_TESTNET", "false").lower() == "true"
+    # WebSocket client: "aiohttp" (default) or "picows" (optional, faster frame parsing)
+    ws_backend: str = _env("BYBIT_WS_BACKEND", "aiohttp").lower()
     
     @property
     def base_url(self) -> str:
@@ -14,17 +24,25 @@ class BybitConfig:
 
 @dataclass
 class TradingConfig:
-    symbols: List[str] = None
+    symbols: Tuple[str, ...] = None
     position_size_usdt: float = 100.0
     leverage: int = 20
     margin_mode: str = "ISOLATED"
     
     def __post_init__(self):
         if self.symbols is None:
-            symbols_str = os.getenv("SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT,XRPUSDT,ADAUSDT,DOGEUSDT,AVAXUSDT")
-            self.symbols = [s.strip() for s in symbols_str.split(",")]
-        self.position_size_usdt = float(os.getenv("POSITION_SIZE_USDT", "100"))
-        self.leverage = int(os.getenv("LEVERAGE", "20"))
+            symbols_str = _env("SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,SOLUSDT,XRPUSDT,ADAUSDT,DOGEUSDT,AVAXUSDT")
+            self.symbols = tuple(s.strip() for s in symbols_str.split(","))
+        else:
+            self.symbols = tuple(self.symbols)
+        self._symbols_set = frozenset(self.symbols)
+        self.position_size_usdt = float(_env("POSITION_SIZE_USDT", "100"))
+        self.leverage = int(_env("LEVERAGE", "20"))
+    
+    @property
+    def symbols_set(self) -> FrozenSet[str]:
+        """Configured symbols as a frozenset for O(1) membership checks"""
+        return self._symbols_set
 
 @dataclass
 class IndicatorConfig:
@@ -38,17 +56,18 @@ class IndicatorConfig:
     st_multiplier_1h: float = 3.0
     
     def __post_init__(self):
-        self.ema_period_4h = int(os.getenv("EMA_PERIOD_4H", "200"))
-        self.st_period_4h = int(os.getenv("ST_PERIOD_4H", "10"))
-        self.st_multiplier_4h = float(os.getenv("ST_MULTIPLIER_4H", "3.0"))
-        self.st_period_1h = int(os.getenv("ST_PERIOD_1H", "10"))
-        self.st_multiplier_1h = float(os.getenv("ST_MULTIPLIER_1H", "3.0"))
+        self.ema_period_4h = int(_env("EMA_PERIOD_4H", "200"))
+        self.st_period_4h = int(_env("ST_PERIOD_4H", "10"))
+        self.st_multiplier_4h = float(_env("ST_MULTIPLIER_4H", "3.0"))
+        self.st_period_1h = int(_env("ST_PERIOD_1H", "10"))
+        self.st_multiplier_1h = float(_env("ST_MULTIPLIER_1H", "3.0"))
 
 @dataclass
 class BotConfig:
     # Bot settings
     check_interval_seconds: int = 300
     update_4h_interval_hours: int = 4
+    max_concurrent_symbols: int = 8
     trading_enabled: bool = True
     port: int = 10000
     
@@ -57,6 +76,8 @@ class BotConfig:
     trading: TradingConfig = None
     indicators: IndicatorConfig = None
     
+    _validated: bool = field(default=False, init=False, repr=False)
+    
     def __post_init__(self):
         if self.bybit is None:
             self.bybit = BybitConfig()
@@ -64,12 +85,19 @@ class BotConfig:
             self.trading = TradingConfig()
         if self.indicators is None:
             self.indicators = IndicatorConfig()
-        self.port = int(os.getenv("PORT", "10000"))
-        self.check_interval_seconds = int(os.getenv("CHECK_INTERVAL_SECONDS", "300"))
-        self.update_4h_interval_hours = int(os.getenv("UPDATE_4H_HOURS", "4"))
+        self.port = int(_env("PORT", "10000"))
+        self.check_interval_seconds = int(_env("CHECK_INTERVAL_SECONDS", "300"))
+        self.update_4h_interval_hours = int(_env("UPDATE_4H_HOURS", "4"))
+        self.max_concurrent_symbols = max(1, int(_env("MAX_CONCURRENT_SYMBOLS", "8")))
+        
+        # Validate once at construction; later validate() calls are no-ops
+        self.validate()
     
     def validate(self):
-        """Validate critical configuration"""
+        """Validate critical configuration (runs once, raises ValueError on failure)"""
+        if self._validated:
+            return True
+        
         if not self.bybit.api_key or not self.bybit.api_secret:
             raise ValueError("BYBIT_API_KEY and BYBIT_API_SECRET must be set!")
         
@@ -79,7 +107,17 @@ class BotConfig:
         if self.trading.leverage < 1 or self.trading.leverage > 100:
             raise ValueError("Leverage must be between 1 and 100!")
         
+        self._validated = True
         return True
 
-# Global config instance
-config = BotConfig()
+@functools.lru_cache(maxsize=None)
+def get_config() -> BotConfig:
+    """Get the shared BotConfig instance (built on first use)"""
+    return BotConfig()
+
+
+def __getattr__(name: str):
+    # Keep `from app.config import config` working without building it at import time
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
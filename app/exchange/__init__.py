@@ -1,4 +1,4 @@
 from app.exchange.bybit_client import BybitClient, BybitAPIError
-from app.exchange.websocket import BybitWebSocket
+from app.exchange.websocket import BybitWebSocket, PicowsBybitWebSocket, create_websocket
 
-__all__ = ['BybitClient', 'BybitAPIError', 'BybitWebSocket']
+__all__ = ['BybitClient', 'BybitAPIError', 'BybitWebSocket', 'PicowsBybitWebSocket', 'create_websocket']
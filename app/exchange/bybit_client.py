@@ -5,12 +5,61 @@ import hmac
 import hashlib
 import json
 import logging
-from typing import Dict, List, Optional
+import random
+import uuid
+from typing import Dict, List, Optional, Tuple, Union
 from decimal import Decimal, ROUND_DOWN
+from operator import itemgetter
+from urllib.parse import urlencode
+
+import numpy as np
+from yarl import URL
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to stdlib json
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _dump_body(params: Dict) -> bytes:
+    """Serialize a POST body to compact JSON bytes (signed and sent as-is)"""
+    if orjson is not None:
+        return orjson.dumps(params)
+    return json.dumps(params, separators=(',', ':')).encode('utf-8')
+
+
+def _dump_str(obj) -> str:
+    """JSON serializer for the aiohttp session"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+_NON_CRITICAL_ERRORS = frozenset({
+    110043,  # Leverage not modified
+    100028,  # Unified account margin mode issue
+    110007,  # Not enough balance
+    110025,  # Price out of range
+    110026,  # Position not exists
+})
+
+_RETRY_ERRORS = frozenset({
+    10002,   # Timestamp error
+    10006,   # Rate limit
+    10018,   # Internal error
+    10019,   # Server busy
+    10004,   # IP ban (temporary)
+})
+
+# Repeated orderLinkId: an earlier attempt of the same order already reached the exchange
+_DUPLICATE_ORDER_LINK_ID = 110072
+
+
 class BybitAPIError(Exception):
     """Custom exception for Bybit API errors"""
     def __init__(self, code: int, message: str):
@@ -29,21 +78,19 @@ class BybitClient:
     - Critical errors raise BybitAPIError
     """
     
-    NON_CRITICAL_ERRORS = {
-        110043,  # Leverage not modified
-        100028,  # Unified account margin mode issue
-        110007,  # Not enough balance
-        110025,  # Price out of range
-        110026,  # Position not exists
-    }
-    
-    RETRY_ERRORS = {
-        10002,   # Timestamp error
-        10006,   # Rate limit
-        10018,   # Internal error
-        10019,   # Server busy
-        10004,   # IP ban (temporary)
-    }
+    NON_CRITICAL_ERRORS = _NON_CRITICAL_ERRORS
+    RETRY_ERRORS = _RETRY_ERRORS
+    
+    # Retry delays per attempt (seconds); jitter is added so that concurrent
+    # requests hitting a rate limit don't all retry at the same moment
+    RETRY_BACKOFFS = (1.0, 2.0, 4.0)
+    RETRY_JITTER = 0.5
+    
+    # Instrument specs (lot size, tick size) rarely change - cache them per symbol
+    INSTRUMENTS_CACHE_TTL = 3600
+    
+    # Finest qty step precision handled with integer math in calculate_qty
+    MAX_QTY_DECIMALS = 12
     
     def __init__(self, config):
         self.api_key = config.api_key
@@ -51,12 +98,34 @@ class BybitClient:
         self.base_url = config.base_url
         self.recv_window = "10000"
         self._session: Optional[aiohttp.ClientSession] = None
+        self._instruments_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._qty_units_cache: Dict[str, Tuple[int, int, int, int]] = {}
+        
+        # Signing material and static headers are fixed for the client lifetime
+        self._secret_bytes = self.api_secret.encode('utf-8')
+        self._sign_prefix = f"{self.api_key}{self.recv_window}"
+        self._base_headers = {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-SIGN-TYPE": "2",
+            "X-BAPI-RECV-WINDOW": self.recv_window,
+            "Content-Type": "application/json"
+        }
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create aiohttp session"""
+        """Get or create aiohttp session (shared by all requests, keeps connections alive)"""
         if self._session is None or self._session.closed:
             timeout = aiohttp.ClientTimeout(total=15)
-            self._session = aiohttp.ClientSession(timeout=timeout)
+            connector = aiohttp.TCPConnector(
+                limit_per_host=30,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=timeout,
+                connector=connector,
+                json_serialize=_dump_str
+            )
         return self._session
     
     async def close(self):
@@ -64,28 +133,40 @@ class BybitClient:
         if self._session and not self._session.closed:
             await self._session.close()
     
-    def _generate_signature(self, params: str, timestamp: str) -> str:
-        """Generate HMAC SHA256 signature"""
-        param_str = f"{timestamp}{self.api_key}{self.recv_window}{params}"
+    async def __aenter__(self) -> "BybitClient":
+        await self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Get jittered backoff delay for a retry attempt"""
+        backoff = self.RETRY_BACKOFFS[min(attempt, len(self.RETRY_BACKOFFS) - 1)]
+        return backoff + random.random() * self.RETRY_JITTER
+    
+    def _generate_signature(self, params: Union[str, bytes], timestamp: str) -> str:
+        """Generate HMAC SHA256 signature (POST bodies are signed as the exact bytes sent)"""
+        prefix = f"{timestamp}{self._sign_prefix}"
+        if isinstance(params, bytes):
+            message = prefix.encode('utf-8') + params
+        else:
+            message = f"{prefix}{params}".encode('utf-8')
         return hmac.new(
-            self.api_secret.encode('utf-8'),
-            param_str.encode('utf-8'),
+            self._secret_bytes,
+            message,
             hashlib.sha256
         ).hexdigest()
     
-    def _get_headers(self, params: str = "") -> Dict[str, str]:
+    def _get_headers(self, params: Union[str, bytes] = "") -> Dict[str, str]:
         """Get request headers with signature"""
-        timestamp = str(int(time.time() * 1000))
+        timestamp = str(time.time_ns() // 1_000_000)
         signature = self._generate_signature(params, timestamp)
         
-        return {
-            "X-BAPI-API-KEY": self.api_key,
-            "X-BAPI-SIGN": signature,
-            "X-BAPI-SIGN-TYPE": "2",
-            "X-BAPI-TIMESTAMP": timestamp,
-            "X-BAPI-RECV-WINDOW": self.recv_window,
-            "Content-Type": "application/json"
-        }
+        headers = self._base_headers.copy()
+        headers["X-BAPI-SIGN"] = signature
+        headers["X-BAPI-TIMESTAMP"] = timestamp
+        return headers
     
     async def _request(
         self,
@@ -100,21 +181,27 @@ class BybitClient:
         url = f"{self.base_url}{endpoint}"
         session = await self._get_session()
         
+        # Serialize POST body / GET query once - the same bytes are signed and sent
+        body = None
+        query = ""
+        if method == "POST" and params:
+            body = _dump_body(params)
+        elif method == "GET" and params:
+            query = urlencode(sorted(params.items()), doseq=True)
+        get_url = URL(f"{url}?{query}", encoded=True) if query else url
+        
         for attempt in range(max_retries):
             try:
-                headers = {}
+                headers = {"Content-Type": "application/json"} if body else {}
                 if signed:
-                    params_str = json.dumps(params) if params and method == "POST" else ""
-                    if method == "GET" and params:
-                        params_str = "&".join([f"{k}={v}" for k, v in sorted(params.items())])
-                    headers = self._get_headers(params_str)
+                    headers = self._get_headers(body if body else query)
                 
                 if method == "GET":
-                    async with session.get(url, params=params, headers=headers) as response:
-                        data = await response.json()
+                    async with session.get(get_url, headers=headers) as response:
+                        data = await response.json(loads=_json_loads)
                 else:
-                    async with session.post(url, json=params, headers=headers) as response:
-                        data = await response.json()
+                    async with session.post(url, data=body, headers=headers) as response:
+                        data = await response.json(loads=_json_loads)
                 
                 if not data:
                     raise Exception("Empty response from Bybit API")
@@ -123,13 +210,13 @@ class BybitClient:
                 ret_msg = data.get("retMsg", "Unknown error")
                 
                 if ret_code != 0:
-                    if ret_code in self.RETRY_ERRORS and attempt < max_retries - 1:
-                        wait_time = 2 ** attempt
-                        logger.warning(f"API error {ret_code}, retrying in {wait_time}s...")
+                    if ret_code in _RETRY_ERRORS and attempt < max_retries - 1:
+                        wait_time = self._retry_delay(attempt)
+                        logger.warning(f"API error {ret_code}, retrying in {wait_time:.1f}s...")
                         await asyncio.sleep(wait_time)
                         continue
                     
-                    if ret_code in self.NON_CRITICAL_ERRORS:
+                    if ret_code in _NON_CRITICAL_ERRORS:
                         return {"error": ret_msg, "retCode": ret_code, "retMsg": ret_msg}
                     
                     logger.error(f"Bybit API error: {data}")
@@ -142,8 +229,8 @@ class BybitClient:
             
             except asyncio.TimeoutError:
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Request timeout, retry {attempt + 1}/{max_retries} in {wait_time}s")
+                    wait_time = self._retry_delay(attempt)
+                    logger.warning(f"Request timeout, retry {attempt + 1}/{max_retries} in {wait_time:.1f}s")
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"Request timeout after {max_retries} attempts")
@@ -151,8 +238,8 @@ class BybitClient:
             
             except aiohttp.ClientError as e:
                 if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    logger.warning(f"Request error: {e}, retry {attempt + 1}/{max_retries} in {wait_time}s")
+                    wait_time = self._retry_delay(attempt)
+                    logger.warning(f"Request error: {e}, retry {attempt + 1}/{max_retries} in {wait_time:.1f}s")
                     await asyncio.sleep(wait_time)
                 else:
                     logger.error(f"Request failed after {max_retries} attempts: {e}")
@@ -189,18 +276,41 @@ class BybitClient:
         
         result = await self._request("GET", "/v5/market/kline", params)
         candles = result.get("list", [])
+        count = len(candles)
         
         # ===== FIX 8.2: Warning for incomplete data =====
-        if len(candles) < limit * 0.9:
-            logger.warning(f"[{symbol}] Received fewer candles than requested: {len(candles)}/{limit} (may indicate API issue)")
+        if count < limit * 0.9:
+            logger.warning(f"[{symbol}] Received fewer candles than requested: {count}/{limit} (may indicate API issue)")
         
         # Validate candle data
-        validated = []
-        for candle in candles:
-            if len(candle) >= 5:
-                validated.append(candle)
+        return [candle for candle in candles if len(candle) >= 5]
+    
+    async def get_klines_array(
+        self,
+        symbol: str,
+        interval: str,
+        limit: int = 200
+    ) -> np.ndarray:
+        """
+        Get kline data parsed once into a float64 array
         
-        return validated
+        Returns:
+            Array of shape (N, 7): [timestamp, open, high, low, close, volume, turnover]
+            in chronological order (oldest first), ready for indicator calculations
+        """
+        candles = await self.get_klines(symbol, interval, limit)
+        if not candles:
+            return np.empty((0, 7), dtype=np.float64)
+        
+        rows = [c[:7] for c in reversed(candles)]
+        if all(len(row) == 7 for row in rows):
+            return np.array(rows, dtype=np.float64)
+        
+        # Rows of mixed length: missing trailing columns (e.g. turnover) stay zero
+        arr = np.zeros((len(rows), 7), dtype=np.float64)
+        for i, row in enumerate(rows):
+            arr[i, :len(row)] = row
+        return arr
     
     async def get_ticker(self, symbol: str) -> Optional[Dict]:
         """
@@ -223,9 +333,15 @@ class BybitClient:
         """
         Get instrument specifications
         
+        Results are cached per symbol for INSTRUMENTS_CACHE_TTL seconds.
+        
         Returns:
             Dict with instrument info, or None if not found
         """
+        cached = self._instruments_cache.get(symbol)
+        if cached and time.time() - cached[0] < self.INSTRUMENTS_CACHE_TTL:
+            return cached[1]
+        
         params = {
             "category": "linear",
             "symbol": symbol
@@ -234,7 +350,11 @@ class BybitClient:
         result = await self._request("GET", "/v5/market/instruments-info", params)
         instruments = result.get("list", [])
         # ===== FIX 3.1: Return None instead of empty dict for better validation =====
-        return instruments[0] if instruments else None
+        info = instruments[0] if instruments else None
+        if info:
+            self._instruments_cache[symbol] = (time.time(), info)
+            self._qty_units_cache.pop(symbol, None)
+        return info
     
     async def set_leverage(self, symbol: str, leverage: int):
         """Set leverage for symbol"""
@@ -348,6 +468,30 @@ class BybitClient:
             logger.error(f"Error getting total equity: {e}")
             return None
     
+    def _get_qty_units(self, symbol: str, lot_size_filter: Dict) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Get lot size limits scaled to integer units: (step, min, max, scale)
+        
+        Cached per symbol until instruments info is refreshed.
+        Returns None when the step precision is too fine for integer math.
+        """
+        units = self._qty_units_cache.get(symbol)
+        if units is not None:
+            return units
+        
+        min_qty = Decimal(str(lot_size_filter.get("minOrderQty", "0.001")))
+        qty_step = Decimal(str(lot_size_filter.get("qtyStep", "0.001")))
+        max_qty = Decimal(str(lot_size_filter.get("maxOrderQty", "1000000")))
+        
+        decimals = max(0, -min(d.as_tuple().exponent for d in (min_qty, qty_step, max_qty)))
+        if decimals > self.MAX_QTY_DECIMALS or qty_step <= 0:
+            return None
+        
+        scale = 10 ** decimals
+        units = (int(qty_step * scale), int(min_qty * scale), int(max_qty * scale), scale)
+        self._qty_units_cache[symbol] = units
+        return units
+    
     async def calculate_qty(
         self,
         symbol: str,
@@ -357,7 +501,8 @@ class BybitClient:
         """
         Calculate order quantity based on USDT size
         
-        Uses Decimal for precision
+        Uses integer arithmetic on the lot size step units
+        (Decimal fallback for unusually fine step precision)
         
         Raises:
             ValueError: If instruments info cannot be retrieved
@@ -371,6 +516,15 @@ class BybitClient:
         if not lot_size_filter or not isinstance(lot_size_filter, dict):
             raise ValueError(f"Invalid lotSizeFilter for {symbol}")
         
+        units = self._get_qty_units(symbol, lot_size_filter)
+        if units is not None:
+            step_units, min_units, max_units, scale = units
+            # Small epsilon guards against float error right at a step boundary
+            qty_units = int(size_usdt * scale / price + 1e-9)
+            qty_units = (qty_units // step_units) * step_units
+            qty_units = max(min_units, min(qty_units, max_units))
+            return qty_units / scale
+        
         min_qty = Decimal(str(lot_size_filter.get("minOrderQty", "0.001")))
         qty_step = Decimal(str(lot_size_filter.get("qtyStep", "0.001")))
         max_qty = Decimal(str(lot_size_filter.get("maxOrderQty", "1000000")))
@@ -418,29 +572,71 @@ class BybitClient:
                 raise ValueError("Price is required for Limit orders")
             params["price"] = str(price)
         
-        # Return full response for order placement
-        url = f"{self.base_url}/v5/order/create"
-        params_str = json.dumps(params)
-        headers = self._get_headers(params_str)
+        # Client order ID makes retries idempotent - Bybit rejects a duplicate orderLinkId,
+        # and a lost response is resolved by looking the order up by this ID
+        link_id = uuid.uuid4().hex
+        params["orderLinkId"] = link_id
         
+        # Return full response for order placement
         try:
-            session = await self._get_session()
-            async with session.post(url, json=params, headers=headers) as response:
-                data = await response.json()
-                
-                if not data:
-                    raise Exception("Empty response from Bybit API")
-                
-                ret_code = data.get("retCode", 0)
-                if ret_code == 0:
-                    logger.info(f"Order placed: {symbol} {side} {qty} {order_type}")
-                else:
-                    logger.warning(f"Order response: {symbol} {side} - {data.get('retMsg', 'Unknown')} (code: {ret_code})")
-                
-                return data
+            data = await self._request(
+                "POST", "/v5/order/create", params,
+                signed=True, return_full_response=True
+            )
+        except BybitAPIError as e:
+            data = {"retCode": e.code, "retMsg": e.message}
+            if e.code == _DUPLICATE_ORDER_LINK_ID:
+                # A retry after a lost response: the first attempt created the order
+                data = await self._find_order_by_link_id(symbol, link_id) or data
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            # The last attempt may still have reached the exchange
+            data = await self._find_order_by_link_id(symbol, link_id)
+            if data is None:
+                logger.error(f"Error placing order: {e}")
+                raise
         except Exception as e:
             logger.error(f"Error placing order: {e}")
             raise
+        
+        ret_code = data.get("retCode", 0)
+        if ret_code == 0:
+            logger.info(f"Order placed: {symbol} {side} {qty} {order_type}")
+        else:
+            logger.warning(f"Order response: {symbol} {side} - {data.get('retMsg', 'Unknown')} (code: {ret_code})")
+        
+        return data
+    
+    async def _find_order_by_link_id(self, symbol: str, link_id: str) -> Optional[Dict]:
+        """
+        Look up an order by orderLinkId (open orders first, then order history)
+        
+        Returns:
+            A successful order/create style response ({"retCode": 0, "result": {...}}),
+            or None if the order does not exist or cannot be queried
+        """
+        params = {
+            "category": "linear",
+            "symbol": symbol,
+            "orderLinkId": link_id
+        }
+        
+        for endpoint in ("/v5/order/realtime", "/v5/order/history"):
+            try:
+                result = await self._request("GET", endpoint, params, signed=True)
+            except Exception as e:
+                logger.warning(f"Cannot look up order {link_id} for {symbol}: {e}")
+                return None
+            
+            for order in result.get("list", []):
+                if order.get("orderLinkId") == link_id:
+                    logger.info(f"Order {link_id} for {symbol} exists on the exchange ({order.get('orderStatus')})")
+                    return {
+                        "retCode": 0,
+                        "retMsg": "OK",
+                        "result": {"orderId": order.get("orderId"), "orderLinkId": link_id}
+                    }
+        
+        return None
     
     async def get_open_orders(self, symbol: Optional[str] = None) -> List[Dict]:
         """Get open orders"""
@@ -496,23 +692,20 @@ class BybitClient:
             executions = result.get("list", [])
             
             if executions:
-                # Calculate average execution price from all fills
+                # Calculate average execution price from all fills (one pass, malformed fills skipped)
                 total_qty = 0.0
                 total_value = 0.0
                 
                 for exec_item in executions:
-                    exec_qty_str = exec_item.get("execQty", "0")
-                    exec_price_str = exec_item.get("execPrice", "0")
-                    
                     try:
-                        exec_qty = float(exec_qty_str)
-                        exec_price = float(exec_price_str)
-                        
-                        if exec_qty > 0 and exec_price > 0:
-                            total_qty += exec_qty
-                            total_value += exec_qty * exec_price
+                        exec_qty = float(exec_item.get("execQty") or 0)
+                        exec_price = float(exec_item.get("execPrice") or 0)
                     except (ValueError, TypeError):
                         continue
+                    
+                    if exec_qty > 0 and exec_price > 0:
+                        total_qty += exec_qty
+                        total_value += exec_qty * exec_price
                 
                 if total_qty > 0:
                     avg_execution_price = total_value / total_qty
@@ -562,11 +755,12 @@ class BybitClient:
             result = await self._request("GET", "/v5/execution/list", params, signed=True)
             executions = result.get("list", [])
             
-            # Sort by execution time (newest first)
+            # Sort by execution time (newest first) - execTime is a fixed-width
+            # ms timestamp string, so string order matches numeric order
             if executions:
                 try:
-                    executions.sort(key=lambda x: int(x.get("execTime", "0")), reverse=True)
-                except (ValueError, TypeError):
+                    executions.sort(key=itemgetter("execTime"), reverse=True)
+                except (KeyError, TypeError):
                     pass
             
             return executions
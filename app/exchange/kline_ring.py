@@ -0,0 +1,147 @@
+from typing import Iterator, List, Sequence, Union
+
+import numpy as np
+
+# Column order of the candle fields: start time, OHLC, volume, turnover
+KLINE_FIELDS = ('ts', 'o', 'h', 'l', 'c', 'v', 't')
+_FIELD_ROW = {name: row for row, name in enumerate(KLINE_FIELDS)}
+
+
+class KlineRing:
+    """
+    Fixed-capacity ring buffer of candles stored column-wise (structure of arrays)
+
+    Each field lives in its own contiguous float64 row of a (7, capacity)
+    array, so a field read (e.g. closes) is a single contiguous slice that
+    indicator kernels consume without boxing, and a full window is one
+    gather. Start timestamps are exact in float64 (milliseconds < 2**53) and
+    are returned as int64. Iteration, len() and indexing keep the old
+    [timestamp, open, high, low, close, volume, turnover] list format for
+    existing callers.
+    """
+
+    __slots__ = ("capacity", "columns", "head", "count")
+
+    def __init__(self, capacity: int = 500):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be >= 1, got {capacity}")
+        self.capacity = capacity
+        self.columns = np.zeros((len(KLINE_FIELDS), capacity), dtype=np.float64)
+        self.head = 0  # Next write position
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __bool__(self) -> bool:
+        return self.count > 0
+
+    def __iter__(self) -> Iterator[list]:
+        return iter(self.to_list(self.count))
+
+    def __getitem__(self, index: int) -> list:
+        """Candle by chronological index (negative indexes count from the newest)"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("KlineRing index out of range")
+        record = self.columns[:, (self.head - self.count + index) % self.capacity].tolist()
+        record[0] = int(record[0])
+        return record
+
+    def _write(self, pos: int, candle: Sequence):
+        record = tuple(candle[:7])
+        if len(record) < 7:
+            record += (0.0,) * (7 - len(record))
+        self.columns[:, pos] = record
+
+    def _positions(self, n: int) -> np.ndarray:
+        """Physical indexes of the newest n candles, oldest first"""
+        return (np.arange(self.head - n, self.head) % self.capacity)
+
+    def append(self, candle: Sequence):
+        """Add a candle, overwriting the oldest one when full"""
+        self._write(self.head, candle)
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def extend(self, candles: Union[Sequence[Sequence], np.ndarray]):
+        """Append candles in order (oldest first); a 2-D array is written in bulk"""
+        if isinstance(candles, np.ndarray):
+            self._extend_array(candles)
+            return
+        for candle in candles:
+            self.append(candle)
+
+    def _extend_array(self, block: np.ndarray):
+        """Bulk append of an (n, >=5) array, one slice write per wrap segment"""
+        if block.ndim != 2:
+            raise ValueError("Candle array must be 2-D")
+        block = block[-self.capacity:]
+        n = len(block)
+        if n == 0:
+            return
+        rows = np.zeros((len(KLINE_FIELDS), n), dtype=np.float64)
+        width = min(block.shape[1], len(KLINE_FIELDS))
+        rows[:width] = block[:, :width].T
+        first = min(n, self.capacity - self.head)
+        self.columns[:, self.head:self.head + first] = rows[:, :first]
+        self.columns[:, :n - first] = rows[:, first:]
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def update_last(self, candle: Sequence):
+        """Overwrite the newest candle in place"""
+        if self.count == 0:
+            self.append(candle)
+            return
+        self._write((self.head - 1) % self.capacity, candle)
+
+    def last_timestamp(self) -> int:
+        """Start timestamp of the newest candle, 0 if empty"""
+        if self.count == 0:
+            return 0
+        return int(self.columns[0, (self.head - 1) % self.capacity])
+
+    def _field(self, name: str, limit: int) -> np.ndarray:
+        column = self.columns[_FIELD_ROW[name]]
+        n = min(max(limit, 0), self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            return column[start:start + n].copy()
+        return np.concatenate((column[start:], column[:self.head]))
+
+    def closes(self, limit: int = 500) -> np.ndarray:
+        """Newest `limit` close prices as a float64 array, oldest first"""
+        return self._field('c', limit)
+
+    def timestamps(self, limit: int = 500) -> np.ndarray:
+        """Newest `limit` start timestamps as an int64 array, oldest first"""
+        return self._field('ts', limit).astype(np.int64)
+
+    def to_array(self, limit: int = 500) -> np.ndarray:
+        """
+        Newest `limit` candles as an (n, 7) float64 array, oldest first
+
+        The result is Fortran-ordered, so each field column (e.g. arr[:, 4])
+        is contiguous.
+        """
+        n = min(max(limit, 0), self.count)
+        start = (self.head - n) % self.capacity
+        if start + n <= self.capacity:
+            window = self.columns[:, start:start + n]
+        else:
+            window = np.concatenate((self.columns[:, start:], self.columns[:, :self.head]), axis=1)
+        return np.asfortranarray(window.T)
+
+    def to_list(self, limit: int = 500, newest_first: bool = False) -> List[list]:
+        """Newest `limit` candles as lists (backwards-compatible format)"""
+        n = min(max(limit, 0), self.count)
+        positions = self._positions(n)
+        if newest_first:
+            positions = positions[::-1]
+        records = self.columns[:, positions].T.tolist()
+        for record in records:
+            record[0] = int(record[0])
+        return records
@@ -1,12 +1,48 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Callable, Optional, List, Set
-from collections import deque
+from operator import itemgetter
+from typing import Dict, Callable, Optional, List, Set, Tuple, Union
 import aiohttp
+import numpy as np
+
+from app.exchange.kline_ring import KlineRing
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to stdlib json
+    orjson = None
+
+try:
+    import picows
+    PICOWS_AVAILABLE = True
+except ImportError:  # picows is optional - the aiohttp client is the default
+    picows = None
+    PICOWS_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# Frames carrying JSON payloads; binary frames are parsed straight from bytes
+_MISSING = object()
+_DATA_MSG_TYPES = frozenset({aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY})
+
+_DICT_CANDLE_FIELDS = itemgetter("start", "open", "high", "low", "close", "volume", "turnover")
+
+# Kline streams are keyed by (symbol, interval) tuples - no string building per frame
+KlineKey = Tuple[str, str]
+
+
+def _dump_str(obj) -> str:
+    """Serialize an outgoing message (Bybit expects text frames)"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_PING_MSG = _dump_str({"op": "ping"})
+
 
 class BybitWebSocket:
     """
@@ -19,26 +55,56 @@ class BybitWebSocket:
     - Candle confirmation tracking
     """
     
-    def __init__(self, testnet: bool = False):
+    # Max frames parsed per listen() iteration before yielding to the event loop
+    MAX_DRAIN = 64
+    # Cleared if the installed aiohttp lacks the reader buffer _frames_buffered() inspects
+    _drain_supported = True
+    # Callback workers; callbacks for one symbol always go to the same worker, so they stay ordered.
+    # Confirmed-candle callbacks get their own workers (unbounded queues, never dropped) so they
+    # never wait behind ticker callbacks; ticker callbacks are dropped when their queue is full.
+    CALLBACK_WORKERS = 4
+    CALLBACK_QUEUE_SIZE = 1024
+    # Bybit requires an application-level {"op": "ping"} at least every 20 seconds
+    PING_INTERVAL = 20
+    # Topics per subscribe request
+    SUBSCRIBE_BATCH = 10
+    
+    def __init__(self, testnet: bool = False, session: Optional[aiohttp.ClientSession] = None):
         self.testnet = testnet
         self.ws_url = "wss://stream-testnet.bybit.com/v5/public/linear" if testnet else "wss://stream.bybit.com/v5/public/linear"
         self.ws: Optional[aiohttp.ClientWebSocketResponse] = None
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Session is reused across reconnects; an injected session is never closed here
+        self.session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
         self.callbacks: Dict[str, Callable] = {}
-        self.kline_callbacks: Dict[str, Callable] = {}
+        self.kline_callbacks: Dict[KlineKey, Callable] = {}
         self.running = False
         self.subscribed_symbols: Set[str] = set()
-        self.subscribed_klines: Set[str] = set()
-        self.ping_task: Optional[asyncio.Task] = None
+        self.subscribed_klines: Set[KlineKey] = set()
+        self._last_ping = 0.0
         self.reconnect_delay = 5
         self.max_reconnect_delay = 60
         self.current_reconnect_delay = 5
         
-        # Kline data storage
-        self.kline_data: Dict[str, deque] = {}
+        # Kline data storage, keyed by (symbol, interval)
+        # No lock needed: reads and writes never await, so they cannot interleave on the event loop
+        self.kline_data: Dict[KlineKey, KlineRing] = {}
         self.max_klines_per_symbol = 500
-        # ===== CRITICAL FIX 3: Lock for kline_data access to prevent race conditions =====
-        self._kline_lock = asyncio.Lock()
+        
+        # Callbacks run on worker tasks so slow user code never stalls listen(): (callback, args, description)
+        self._cb_queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=self.CALLBACK_QUEUE_SIZE) for _ in range(self.CALLBACK_WORKERS)
+        ]
+        self._closed_cb_queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(self.CALLBACK_WORKERS)]
+        self._cb_workers: List[asyncio.Task] = []
+        # Latest ticker price per symbol within one drained batch, dispatched once at its end
+        self._pending_prices: Dict[str, float] = {}
+        
+        # Message handlers keyed by the first topic segment ("tickers.BTCUSDT" -> "tickers")
+        self._topic_handlers: Dict[str, Callable[[str, dict], None]] = {
+            "tickers": self._handle_ticker_update,
+            "kline": self._handle_kline_update,
+        }
         
         # Connection state
         self._connecting = False
@@ -53,25 +119,25 @@ class BybitWebSocket:
         self._connecting = True
         
         try:
-            # Cleanup old connections
+            # Cleanup old connection (the session and its connector stay warm)
             await self._cleanup()
             
-            self.session = aiohttp.ClientSession()
-            self.ws = await self.session.ws_connect(
-                self.ws_url,
-                heartbeat=20,
-                receive_timeout=60  # Increased to reduce false timeouts
-            )
+            await self._open()
             self.running = True
             self._reconnect_count = 0
             self.current_reconnect_delay = self.reconnect_delay
             
             logger.info(f"✓ WebSocket connected to {self.ws_url}")
             
-            # Start ping task
-            if self.ping_task:
-                self.ping_task.cancel()
-            self.ping_task = asyncio.create_task(self._ping_loop())
+            # Start callback workers (kept across reconnects)
+            if not self._cb_workers:
+                self._cb_workers = [
+                    asyncio.create_task(self._cb_worker(queue))
+                    for queue in self._cb_queues + self._closed_cb_queues
+                ]
+            
+            # Pings are sent from listen(), no separate task
+            self._last_ping = asyncio.get_running_loop().time()
             
             return True
         
@@ -81,15 +147,34 @@ class BybitWebSocket:
         finally:
             self._connecting = False
     
+    async def _open(self):
+        """Open the WebSocket connection and set self.ws"""
+        if self.session is None or self.session.closed:
+            if not self._owns_session:
+                raise RuntimeError("Shared ClientSession is closed")
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ttl_dns_cache=600)
+            )
+        # No default receive timeout: listen() bounds the blocking receive by the ping
+        # interval, and draining already-buffered frames then skips the timeout context
+        self.ws = await self.session.ws_connect(
+            self.ws_url,
+            heartbeat=20
+        )
+    
     async def _cleanup(self):
-        """Cleanup old WebSocket and session"""
+        """Close the current WebSocket (the session is kept for reconnects)"""
         if self.ws and not self.ws.closed:
             try:
                 await self.ws.close()
             except Exception:
                 pass
         self.ws = None
-        
+    
+    async def _close_session(self):
+        """Close the session if this client created it"""
+        if not self._owns_session:
+            return
         if self.session and not self.session.closed:
             try:
                 await self.session.close()
@@ -101,14 +186,14 @@ class BybitWebSocket:
         """Close WebSocket connection"""
         self.running = False
         
-        if self.ping_task:
-            self.ping_task.cancel()
-            try:
-                await self.ping_task
-            except asyncio.CancelledError:
-                pass
+        for worker in self._cb_workers:
+            worker.cancel()
+        if self._cb_workers:
+            await asyncio.gather(*self._cb_workers, return_exceptions=True)
+        self._cb_workers = []
         
         await self._cleanup()
+        await self._close_session()
         logger.info("✓ WebSocket disconnected")
     
     async def subscribe_ticker(self, symbol: str, callback: Callable) -> bool:
@@ -125,7 +210,7 @@ class BybitWebSocket:
                 "args": [f"tickers.{symbol}"]
             }
             
-            await self.ws.send_json(subscribe_msg)
+            await self.ws.send_str(_dump_str(subscribe_msg))
             self.subscribed_symbols.add(symbol)
             
             logger.info(f"✓ Subscribed to {symbol} ticker")
@@ -142,19 +227,19 @@ class BybitWebSocket:
             return False
         
         try:
-            key = f"{symbol}:{interval}"
+            key = (symbol, interval)
             if callback:
                 self.kline_callbacks[key] = callback
             
             if key not in self.kline_data:
-                self.kline_data[key] = deque(maxlen=self.max_klines_per_symbol)
+                self.kline_data[key] = KlineRing(self.max_klines_per_symbol)
             
             subscribe_msg = {
                 "op": "subscribe",
                 "args": [f"kline.{interval}.{symbol}"]
             }
             
-            await self.ws.send_json(subscribe_msg)
+            await self.ws.send_str(_dump_str(subscribe_msg))
             self.subscribed_klines.add(key)
             
             logger.info(f"✓ Subscribed to {symbol} kline {interval}min")
@@ -164,40 +249,111 @@ class BybitWebSocket:
             logger.error(f"Error subscribing to {symbol} kline {interval}: {e}")
             return False
     
-    async def get_klines(self, symbol: str, interval: str, limit: int = 200) -> List[list]:
+    async def subscribe_many(
+        self,
+        tickers: Dict[str, Callable],
+        klines: Dict[KlineKey, Optional[Callable]]
+    ) -> bool:
+        """
+        Subscribe to many ticker and kline streams with batched subscribe requests
+        
+        Args:
+            tickers: Ticker callback per symbol
+            klines: Kline callback (or None) per (symbol, interval)
+        
+        Returns:
+            True if every subscribe request was sent
+        """
+        if not self.ws or not self.running:
+            logger.error("WebSocket not connected")
+            return False
+        
+        self.callbacks.update(tickers)
+        for key, callback in klines.items():
+            if callback:
+                self.kline_callbacks[key] = callback
+            if key not in self.kline_data:
+                self.kline_data[key] = KlineRing(self.max_klines_per_symbol)
+        
+        args = [f"tickers.{symbol}" for symbol in tickers]
+        args.extend(f"kline.{interval}.{symbol}" for symbol, interval in klines)
+        
+        try:
+            await self._send_subscribe(args)
+        except Exception as e:
+            logger.error(f"Error subscribing to {len(args)} topics: {e}")
+            return False
+        
+        self.subscribed_symbols.update(tickers)
+        self.subscribed_klines.update(klines)
+        
+        logger.info(f"✓ Subscribed to {len(tickers)} tickers and {len(klines)} kline streams")
+        return True
+    
+    async def _send_subscribe(self, args: List[str]):
+        """Send subscribe requests for topics, SUBSCRIBE_BATCH topics per frame"""
+        for i in range(0, len(args), self.SUBSCRIBE_BATCH):
+            await self.ws.send_str(_dump_str({"op": "subscribe", "args": args[i:i + self.SUBSCRIBE_BATCH]}))
+    
+    def get_klines(self, symbol: str, interval: str, limit: int = 200) -> List[list]:
         """
         Get stored kline data from WebSocket cache
         
         Returns in reverse chronological order (newest first) to match REST API format
         """
-        key = f"{symbol}:{interval}"
-        async with self._kline_lock:
-            if key not in self.kline_data:
-                return []
-            
-            klines = list(self.kline_data[key])
-            latest_klines = klines[-limit:] if len(klines) > limit else klines
-            return latest_klines[::-1]
+        key = (symbol, interval)
+        if key not in self.kline_data:
+            return []
+        
+        return self.kline_data[key].to_list(limit, newest_first=True)
     
-    async def get_klines_chronological(self, symbol: str, interval: str, limit: int = 200) -> List[list]:
+    def get_klines_chronological(self, symbol: str, interval: str, limit: int = 200) -> List[list]:
         """
         Get stored kline data in chronological order (oldest first)
         
         Useful for indicator calculations
         """
-        key = f"{symbol}:{interval}"
-        async with self._kline_lock:
-            if key not in self.kline_data:
-                return []
-            
-            klines = list(self.kline_data[key])
-            return klines[-limit:] if len(klines) > limit else klines
+        key = (symbol, interval)
+        if key not in self.kline_data:
+            return []
+        
+        return self.kline_data[key].to_list(limit)
+    
+    def klines_array(self, symbol: str, interval: str, limit: int = 200) -> np.ndarray:
+        """
+        Get stored klines as an (n, 7) float64 array in chronological order (oldest first)
+        
+        calculate_supertrend* accept it directly, skipping per-field parsing
+        """
+        key = (symbol, interval)
+        if key not in self.kline_data:
+            return np.empty((0, 7), dtype=np.float64)
+        
+        return self.kline_data[key].to_array(limit)
+    
+    def closes_array(self, symbol: str, interval: str, limit: int = 200) -> np.ndarray:
+        """
+        Get stored close prices as a float64 array in chronological order (oldest first)
+        
+        Preferred over get_klines* for indicator calculations (calculate_ema/calculate_sma accept it directly)
+        """
+        key = (symbol, interval)
+        if key not in self.kline_data:
+            return np.empty(0, dtype=np.float64)
+        
+        return self.kline_data[key].closes(limit)
     
-    async def has_klines(self, symbol: str, interval: str) -> bool:
+    def seed_klines(self, symbol: str, interval: str, candles: Union[List[list], np.ndarray]):
+        """Load historical candles (oldest first, lists or an (n, 7) array) into the kline cache"""
+        key = (symbol, interval)
+        if key not in self.kline_data:
+            self.kline_data[key] = KlineRing(self.max_klines_per_symbol)
+        self.kline_data[key].extend(candles)
+    
+    def has_klines(self, symbol: str, interval: str) -> bool:
         """Check if kline data is available"""
-        key = f"{symbol}:{interval}"
-        async with self._kline_lock:
-            return key in self.kline_data and len(self.kline_data[key]) > 0
+        key = (symbol, interval)
+        return key in self.kline_data and len(self.kline_data[key]) > 0
     
     async def unsubscribe_ticker(self, symbol: str):
         """Unsubscribe from ticker updates"""
@@ -210,7 +366,7 @@ class BybitWebSocket:
                 "args": [f"tickers.{symbol}"]
             }
             
-            await self.ws.send_json(unsubscribe_msg)
+            await self.ws.send_str(_dump_str(unsubscribe_msg))
             self.subscribed_symbols.discard(symbol)
             self.callbacks.pop(symbol, None)
             
@@ -225,13 +381,13 @@ class BybitWebSocket:
             return
         
         try:
-            key = f"{symbol}:{interval}"
+            key = (symbol, interval)
             unsubscribe_msg = {
                 "op": "unsubscribe",
                 "args": [f"kline.{interval}.{symbol}"]
             }
             
-            await self.ws.send_json(unsubscribe_msg)
+            await self.ws.send_str(_dump_str(unsubscribe_msg))
             self.subscribed_klines.discard(key)
             self.kline_callbacks.pop(key, None)
             
@@ -240,20 +396,14 @@ class BybitWebSocket:
         except Exception as e:
             logger.error(f"Error unsubscribing from {symbol} kline: {e}")
     
-    async def _ping_loop(self):
-        """Send ping every 20 seconds to keep connection alive"""
-        while self.running:
-            try:
-                await asyncio.sleep(20)
-                
-                if self.ws and not self.ws.closed:
-                    await self.ws.send_json({"op": "ping"})
-                    logger.debug("WebSocket ping sent")
-            
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.error(f"Ping error: {e}")
+    async def _send_ping(self):
+        """Send the application-level ping to keep connection alive"""
+        self._last_ping = asyncio.get_running_loop().time()
+        try:
+            await self.ws.send_str(_PING_MSG)
+            logger.debug("WebSocket ping sent")
+        except Exception as e:
+            logger.error(f"Ping error: {e}")
     
     async def _reconnect(self):
         """Handle reconnection with backoff"""
@@ -273,24 +423,20 @@ class BybitWebSocket:
         connected = await self.connect()
         
         if connected:
-            # Re-subscribe to all tickers
-            for symbol in list(self.subscribed_symbols):
-                callback = self.callbacks.get(symbol)
-                if callback:
-                    await self.subscribe_ticker(symbol, callback)
-            
-            # Re-subscribe to all klines
-            for key in list(self.subscribed_klines):
-                parts = key.split(":")
-                if len(parts) == 2:
-                    symbol, interval = parts
-                    callback = self.kline_callbacks.get(key)
-                    await self.subscribe_kline(symbol, interval, callback)
+            # Re-subscribe to all tickers and klines in batched requests
+            args = [f"tickers.{symbol}" for symbol in self.subscribed_symbols if symbol in self.callbacks]
+            args.extend(f"kline.{interval}.{symbol}" for symbol, interval in self.subscribed_klines)
+            try:
+                await self._send_subscribe(args)
+                logger.info(f"✓ Re-subscribed to {len(args)} topics")
+            except Exception as e:
+                logger.error(f"Error re-subscribing after reconnect: {e}")
         
         return connected
     
     async def listen(self):
         """Listen for WebSocket messages and dispatch to callbacks"""
+        loop = asyncio.get_running_loop()
         while self.running:
             try:
                 if not self.ws or self.ws.closed:
@@ -299,13 +445,36 @@ class BybitWebSocket:
                         await asyncio.sleep(self.current_reconnect_delay)
                     continue
                 
-                msg = await self.ws.receive()
+                # Ping when due; otherwise wait for a frame at most until the next ping
+                until_ping = self.PING_INTERVAL - (loop.time() - self._last_ping)
+                if until_ping <= 0:
+                    await self._send_ping()
+                    continue
+                
+                msg = await self.ws.receive(timeout=until_ping)
+                
+                # Drain frames that are already buffered before yielding to the event loop
+                closed = False
+                drained = 0
+                while True:
+                    if msg.type in _DATA_MSG_TYPES:
+                        self._handle_message(msg.data)
+                    
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        logger.warning(f"WebSocket {msg.type.name}, will reconnect...")
+                        closed = True
+                        break
+                    
+                    drained += 1
+                    if drained >= self.MAX_DRAIN or not self._frames_buffered():
+                        break
+                    # Returns without suspending: the frame is already in the reader queue
+                    msg = await self.ws.receive()
                 
-                if msg.type == aiohttp.WSMsgType.TEXT:
-                    await self._handle_message(msg.data)
+                if self._pending_prices:
+                    self._flush_prices()
                 
-                elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-                    logger.warning(f"WebSocket {msg.type.name}, will reconnect...")
+                if closed:
                     await self._cleanup()
                     continue
             
@@ -320,8 +489,7 @@ class BybitWebSocket:
                     if not await self._reconnect():
                         await asyncio.sleep(self.current_reconnect_delay)
                 else:
-                    # Connection still alive, just no messages received
-                    logger.debug("WebSocket receive timeout (no messages), continuing...")
+                    # Connection still alive, just no messages before the next ping is due
                     continue
             
             except Exception as e:
@@ -334,10 +502,66 @@ class BybitWebSocket:
                 else:
                     await asyncio.sleep(self.reconnect_delay)
     
-    async def _handle_message(self, data: str):
-        """Handle incoming WebSocket message"""
+    def _frames_buffered(self) -> bool:
+        """
+        Check whether received frames are waiting in aiohttp's reader queue
+        
+        aiohttp has no public "frame ready" check (receive(timeout=0) means "no timeout"),
+        so this reads the private WebSocketDataQueue buffer of the aiohttp version pinned
+        in requirements.txt. If that layout changes, draining is disabled with a warning.
+        """
+        buffer = getattr(getattr(self.ws, "_reader", None), "_buffer", _MISSING)
+        if buffer is _MISSING:
+            if self._drain_supported:
+                self._drain_supported = False
+                logger.warning(
+                    f"aiohttp {aiohttp.__version__} has no ws._reader._buffer; "
+                    "frame draining disabled (pin aiohttp to the version in requirements.txt)"
+                )
+            return False
+        return bool(buffer)
+    
+    def _dispatch_callback(self, symbol: str, callback: Callable, args: tuple, description: str,
+                           closed: bool = False):
+        """
+        Queue a callback on its symbol's worker; drops it if the worker is backed up
+        
+        closed=True routes it to the symbol's confirmed-candle worker instead,
+        whose queue is unbounded so closes are never dropped.
+        """
+        queues = self._closed_cb_queues if closed else self._cb_queues
+        queue = queues[hash(symbol) % len(queues)]
         try:
-            message = json.loads(data)
+            queue.put_nowait((callback, args, description))
+        except asyncio.QueueFull:
+            logger.warning(f"Callback queue full, dropping {description}")
+    
+    def _flush_prices(self):
+        """Dispatch one ticker callback per symbol with the newest price of the batch"""
+        pending = self._pending_prices
+        self._pending_prices = {}
+        for symbol, price in pending.items():
+            callback = self.callbacks.get(symbol)
+            if callback is not None:
+                self._dispatch_callback(symbol, callback, (symbol, price), f"ticker callback for {symbol}")
+    
+    async def _cb_worker(self, queue: asyncio.Queue):
+        """Run queued callbacks one at a time, in arrival order"""
+        while True:
+            callback, args, description = await queue.get()
+            try:
+                await callback(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in {description}: {e}")
+            finally:
+                queue.task_done()
+    
+    def _handle_message(self, data: Union[str, bytes]):
+        """Handle incoming WebSocket message (parsed as-is: orjson takes str or bytes without re-encoding)"""
+        try:
+            message = _json_loads(data)
             
             # Handle subscription confirmation
             if message.get("op") == "subscribe":
@@ -352,14 +576,12 @@ class BybitWebSocket:
                 logger.debug("WebSocket pong received")
                 return
             
-            # Handle ticker data
+            # Dispatch ticker/kline data on the topic prefix
             topic = message.get("topic", "")
-            if topic.startswith("tickers."):
-                await self._handle_ticker_update(message)
-            
-            # Handle kline data
-            elif topic.startswith("kline."):
-                await self._handle_kline_update(message)
+            head, _, rest = topic.partition(".")
+            handler = self._topic_handlers.get(head)
+            if handler is not None and rest:
+                handler(rest, message)
             
             # Log unknown messages for debugging
             elif topic and not message.get("op"):
@@ -370,12 +592,9 @@ class BybitWebSocket:
         except Exception as e:
             logger.error(f"Error handling WebSocket message: {e}", exc_info=True)
     
-    async def _handle_ticker_update(self, message: dict):
-        """Handle ticker update message"""
+    def _handle_ticker_update(self, symbol: str, message: dict):
+        """Handle ticker update message (symbol is the topic without the "tickers." prefix)"""
         try:
-            topic = message.get("topic", "")
-            symbol = topic.replace("tickers.", "")
-            
             data = message.get("data", {})
             
             if isinstance(data, list):
@@ -393,27 +612,21 @@ class BybitWebSocket:
             except (ValueError, TypeError):
                 return
             
+            # Coalesced: a burst of ticks for one symbol costs one callback (see _flush_prices)
             if price > 0 and symbol in self.callbacks:
-                callback = self.callbacks[symbol]
-                try:
-                    await callback(symbol, price)
-                except Exception as e:
-                    logger.error(f"Error in ticker callback for {symbol}: {e}")
+                self._pending_prices[symbol] = price
         
         except Exception as e:
             logger.error(f"Error processing ticker update: {e}")
     
-    async def _handle_kline_update(self, message: dict):
-        """Handle kline update message"""
+    def _handle_kline_update(self, rest: str, message: dict):
+        """Handle kline update message (rest is the topic without the "kline." prefix, e.g. "60.BTCUSDT")"""
         try:
-            topic = message.get("topic", "")
-            parts = topic.split(".")
-            if len(parts) != 3:
+            interval, _, symbol = rest.partition(".")
+            if not interval or not symbol or "." in symbol:
                 return
             
-            interval = parts[1]
-            symbol = parts[2]
-            key = f"{symbol}:{interval}"
+            key = (symbol, interval)
             
             data = message.get("data", {})
             if not data:
@@ -425,71 +638,50 @@ class BybitWebSocket:
             
             latest_candle = candles_list[-1]
             
-            # Parse candle data
-            if isinstance(latest_candle, list):
-                if len(latest_candle) < 6:
+            # Parse candle data into an immutable (ts, open, high, low, close, volume, turnover) tuple
+            try:
+                if isinstance(latest_candle, dict):
+                    ts, o, h, l, c, v, t = _DICT_CANDLE_FIELDS(latest_candle)
+                    confirm = latest_candle.get("confirm", False)
+                elif isinstance(latest_candle, list):
+                    if len(latest_candle) < 6:
+                        return
+                    ts, o, h, l, c, v, *extra = latest_candle
+                    t = extra[0] if extra else 0.0
+                    confirm = extra[1] if len(extra) > 1 else False
+                else:
                     return
-                candle_array = latest_candle
-            elif isinstance(latest_candle, dict):
-                candle_array = [
-                    latest_candle.get("start", 0),
-                    latest_candle.get("open", "0"),
-                    latest_candle.get("high", "0"),
-                    latest_candle.get("low", "0"),
-                    latest_candle.get("close", "0"),
-                    latest_candle.get("volume", "0"),
-                    latest_candle.get("turnover", "0"),
-                    latest_candle.get("confirm", False)
-                ]
-            else:
+                
+                candle = (int(ts), float(o), float(h), float(l), float(c), float(v), float(t))
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning(f"Invalid candle data for {symbol}:{interval}: {e}")
                 return
             
-            # Convert to standard format
-            try:
-                candle = [
-                    int(candle_array[0]),
-                    float(candle_array[1]),
-                    float(candle_array[2]),
-                    float(candle_array[3]),
-                    float(candle_array[4]),
-                    float(candle_array[5]),
-                    float(candle_array[6]) if len(candle_array) > 6 else 0.0
-                ]
-            except (ValueError, TypeError, IndexError) as e:
-                logger.warning(f"Invalid candle data for {key}: {e}")
-                return
+            is_confirmed = bool(confirm)
             
-            is_confirmed = bool(candle_array[7]) if len(candle_array) > 7 else False
+            # Store kline data: update the live candle in place or append a newer one
+            klines = self.kline_data.get(key)
+            if klines is None:
+                klines = self.kline_data[key] = KlineRing(self.max_klines_per_symbol)
             
-            # ===== CRITICAL FIX 3: Protect kline_data access with lock =====
-            async with self._kline_lock:
-                # Store kline data
-                if key not in self.kline_data:
-                    self.kline_data[key] = deque(maxlen=self.max_klines_per_symbol)
-                
-                klines = self.kline_data[key]
-                
-                if len(klines) > 0:
-                    last_candle = klines[-1]
-                    last_timestamp = int(last_candle[0]) if last_candle[0] else 0
-                    current_timestamp = candle[0]
-                    
-                    if current_timestamp == last_timestamp:
-                        # Update existing candle
-                        klines[-1] = candle
-                    elif current_timestamp > last_timestamp:
-                        # New candle
-                        klines.append(candle)
-                else:
-                    klines.append(candle)
+            ts = candle[0]
+            last_ts = klines.last_timestamp()
+            if not klines:
+                klines.append(candle)
+            elif ts == last_ts:
+                klines.update_last(candle)
+            elif ts > last_ts:
+                klines.append(candle)
             
-            # Trigger callback for confirmed candles (outside lock to avoid deadlock)
+            # Trigger callback for confirmed candles
             if is_confirmed and key in self.kline_callbacks:
-                callback = self.kline_callbacks[key]
-                try:
-                    await callback(symbol, interval, candle, is_confirmed)
-                except Exception as e:
-                    logger.error(f"Error in kline callback for {key}: {e}")
+                self._dispatch_callback(
+                    symbol,
+                    self.kline_callbacks[key],
+                    (symbol, interval, candle, is_confirmed),
+                    f"kline callback for {symbol}:{interval}",
+                    closed=True
+                )
         
         except Exception as e:
             logger.error(f"Error processing kline update: {e}", exc_info=True)
@@ -504,8 +696,127 @@ class BybitWebSocket:
     
     def get_subscribed_klines(self) -> Set[str]:
         """Get set of subscribed klines (format: symbol:interval)"""
-        return self.subscribed_klines.copy()
+        return {f"{symbol}:{interval}" for symbol, interval in self.subscribed_klines}
     
     def get_reconnect_count(self) -> int:
         """Get number of reconnection attempts"""
         return self._reconnect_count
+
+
+if PICOWS_AVAILABLE:
+    class _PicowsConnection(picows.WSListener):
+        """
+        picows listener exposing the small part of aiohttp's WebSocket API that BybitWebSocket uses
+        
+        Frames are parsed inside on_ws_frame, straight from picows' read buffer.
+        """
+        
+        def __init__(self, owner: "PicowsBybitWebSocket"):
+            super().__init__()
+            self._owner = owner
+            self.transport: Optional["picows.WSTransport"] = None
+            self.closed = False
+            self.disconnected = asyncio.Event()
+        
+        def on_ws_connected(self, transport: "picows.WSTransport"):
+            self.transport = transport
+        
+        def on_ws_frame(self, transport: "picows.WSTransport", frame: "picows.WSFrame"):
+            msg_type = frame.msg_type
+            if msg_type == picows.WSMsgType.TEXT or msg_type == picows.WSMsgType.BINARY:
+                self._owner._on_frame(frame)
+            elif msg_type == picows.WSMsgType.CLOSE:
+                transport.send_close(frame.get_close_code())
+                transport.disconnect()
+        
+        def on_ws_disconnected(self, transport: "picows.WSTransport"):
+            self.closed = True
+            self.disconnected.set()
+        
+        async def send_str(self, data: str):
+            self.transport.send(picows.WSMsgType.TEXT, data.encode('utf-8'))
+        
+        async def close(self):
+            if self.closed:
+                return
+            self.transport.send_close(picows.WSCloseCode.OK)
+            self.transport.disconnect()
+            await self.transport.wait_disconnected()
+
+
+class PicowsBybitWebSocket(BybitWebSocket):
+    """
+    BybitWebSocket on picows (C-accelerated WebSocket client) instead of aiohttp
+    
+    Frames are pushed by picows and handled as they are parsed, so listen()
+    only sends pings and reconnects. Ticker callbacks are still coalesced
+    per read buffer (see _flush_prices). Selected with BYBIT_WS_BACKEND=picows.
+    """
+    
+    async def _open(self):
+        """Open the WebSocket connection with picows"""
+        _, self.ws = await picows.ws_connect(
+            lambda: _PicowsConnection(self),
+            self.ws_url,
+            enable_auto_ping=True,
+            auto_ping_idle_timeout=20
+        )
+    
+    def _on_frame(self, frame):
+        """Handle one data frame; flush coalesced tickers when picows' read buffer is drained"""
+        # orjson parses the memoryview in place; stdlib json needs bytes
+        self._handle_message(frame.get_payload_as_memoryview() if orjson is not None else frame.get_payload_as_bytes())
+        if frame.last_in_buffer and self._pending_prices:
+            self._flush_prices()
+    
+    async def listen(self):
+        """Keep the connection alive: pings and reconnects (frames arrive via _on_frame)"""
+        loop = asyncio.get_running_loop()
+        while self.running:
+            try:
+                if not self.ws or self.ws.closed:
+                    logger.warning("WebSocket closed, reconnecting...")
+                    if not await self._reconnect():
+                        await asyncio.sleep(self.current_reconnect_delay)
+                    continue
+                
+                until_ping = self.PING_INTERVAL - (loop.time() - self._last_ping)
+                if until_ping <= 0:
+                    await self._send_ping()
+                    continue
+                
+                try:
+                    await asyncio.wait_for(self.ws.disconnected.wait(), timeout=until_ping)
+                except (TimeoutError, asyncio.TimeoutError):
+                    continue
+                
+                if not self.running:
+                    break
+                logger.warning("WebSocket disconnected, will reconnect...")
+                await self._cleanup()
+            
+            except asyncio.CancelledError:
+                break
+            
+            except Exception as e:
+                logger.error(f"WebSocket listen error: {e}", exc_info=True)
+                if not self.ws or self.ws.closed:
+                    if not await self._reconnect():
+                        await asyncio.sleep(self.current_reconnect_delay)
+                else:
+                    await asyncio.sleep(self.reconnect_delay)
+
+
+def create_websocket(testnet: bool = False, backend: str = "aiohttp") -> BybitWebSocket:
+    """
+    Create the Bybit WebSocket client for the configured backend
+    
+    Args:
+        testnet: Connect to the testnet stream
+        backend: "aiohttp" (default) or "picows"; falls back to aiohttp if picows is missing
+    """
+    if backend == "picows":
+        if PICOWS_AVAILABLE:
+            return PicowsBybitWebSocket(testnet)
+        logger.warning("picows is not installed, using the aiohttp WebSocket client")
+    return BybitWebSocket(testnet)
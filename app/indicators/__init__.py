@@ -1,4 +1,4 @@
-from app.indicators.supertrend import calculate_supertrend
-from app.indicators.ema import calculate_ema
+from app.indicators.supertrend import calculate_supertrend, calculate_supertrend_incremental, SuperTrendState
+from app.indicators.ema import calculate_ema, calculate_ema_stateful, EmaState
 
-__all__ = ['calculate_supertrend', 'calculate_ema']
+__all__ = ['calculate_supertrend', 'calculate_supertrend_incremental', 'SuperTrendState', 'calculate_ema', 'calculate_ema_stateful', 'EmaState']
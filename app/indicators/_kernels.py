@@ -0,0 +1,223 @@
+"""
+Numba-compiled numeric kernels for the indicator modules
+
+Numba is optional: when it is not installed NUMBA_AVAILABLE is False and
+callers fall back to their pure NumPy/Python implementations.
+"""
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit so kernels stay importable"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+        return decorator
+
+
+@njit(cache=True, fastmath=True)
+def ema_last(closes, period):
+    """EMA recurrence seeded with the first close, returns the last value"""
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    e = closes[0]
+    for i in range(1, closes.shape[0]):
+        e = alpha * closes[i] + beta * e
+    return e
+
+
+@njit(cache=True, fastmath=True)
+def ema_series(closes, period, out):
+    """EMA recurrence seeded with the first close, written into out"""
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    n = closes.shape[0]
+    if n == 0:
+        return out
+    e = closes[0]
+    out[0] = e
+    for i in range(1, n):
+        e = alpha * closes[i] + beta * e
+        out[i] = e
+    return out
+
+
+@njit(cache=True)
+def rma_loop(values, period):
+    """RMA (Wilder) seeded with the NaN-skipping mean of the first period values"""
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < period:
+        return out
+    total = 0.0
+    count = 0
+    for i in range(period):
+        v = values[i]
+        if not math.isnan(v):
+            total += v
+            count += 1
+    r = total / count if count > 0 else np.nan
+    out[period - 1] = r
+    alpha = 1.0 / period
+    beta = 1.0 - alpha
+    for i in range(period, n):
+        r = alpha * values[i] + beta * r
+        out[i] = r
+    return out
+
+
+@njit(cache=True)
+def supertrend_loop(basic_upper, basic_lower, close, start):
+    """
+    SuperTrend band/trend recurrence (TradingView band locking)
+    
+    Returns final upper band, final lower band, SuperTrend line and trend
+    (1 = up, -1 = down) per bar. The previous bar's state is carried in
+    locals, and inputs may also be plain lists (no-numba fallback).
+    
+    Bars before start run with the NaN guards needed during the ATR warm-up;
+    from start on the caller guarantees finite basic bands from start - 1,
+    so the steady-state loop has no NaN tests. Pass start=len(close) to keep
+    the guards everywhere.
+    """
+    n = len(close)
+    final_upper = np.empty(n)
+    final_lower = np.empty(n)
+    supertrend = np.empty(n)
+    trend = np.empty(n, dtype=np.int8)
+    if n == 0:
+        return final_upper, final_lower, supertrend, trend
+    
+    upper = basic_upper[0]
+    lower = basic_lower[0]
+    direction = 1
+    prev_close = close[0]
+    final_upper[0] = upper
+    final_lower[0] = lower
+    trend[0] = direction
+    supertrend[0] = lower
+    
+    # Warm-up: previous bands may still be NaN
+    for i in range(1, min(max(start, 1), n)):
+        prev_upper = upper
+        prev_lower = lower
+        curr_close = close[i]
+        
+        bu = basic_upper[i]
+        if math.isnan(prev_upper) or bu < prev_upper or prev_close > prev_upper:
+            upper = bu
+        
+        bl = basic_lower[i]
+        if math.isnan(prev_lower) or bl > prev_lower or prev_close < prev_lower:
+            lower = bl
+        
+        if curr_close > prev_upper:
+            direction = 1
+        elif curr_close < prev_lower:
+            direction = -1
+        else:
+            # Band locking (TradingView behavior)
+            if direction == 1 and lower < prev_lower:
+                lower = prev_lower
+            if direction == -1 and upper > prev_upper:
+                upper = prev_upper
+        
+        final_upper[i] = upper
+        final_lower[i] = lower
+        trend[i] = direction
+        supertrend[i] = lower if direction == 1 else upper
+        prev_close = curr_close
+    
+    # Steady state: same recurrence without the NaN guards
+    for i in range(max(start, 1), n):
+        prev_upper = upper
+        prev_lower = lower
+        curr_close = close[i]
+        
+        bu = basic_upper[i]
+        if bu < prev_upper or prev_close > prev_upper:
+            upper = bu
+        
+        bl = basic_lower[i]
+        if bl > prev_lower or prev_close < prev_lower:
+            lower = bl
+        
+        if curr_close > prev_upper:
+            direction = 1
+        elif curr_close < prev_lower:
+            direction = -1
+        else:
+            if direction == 1 and lower < prev_lower:
+                lower = prev_lower
+            if direction == -1 and upper > prev_upper:
+                upper = prev_upper
+        
+        final_upper[i] = upper
+        final_lower[i] = lower
+        trend[i] = direction
+        supertrend[i] = lower if direction == 1 else upper
+        prev_close = curr_close
+    
+    return final_upper, final_lower, supertrend, trend
+
+
+@njit(cache=True)
+def supertrend_full(high, low, close, period, multiplier):
+    """
+    Whole SuperTrend pipeline in one compiled pass over OHLC arrays
+    
+    True range (NaN terms skipped like np.fmax), Wilder ATR, basic bands
+    and the band/trend recurrence, without the NumPy temporaries of the
+    step-by-step path. Returns ATR, final upper band, final lower band,
+    SuperTrend line and trend per bar.
+    """
+    n = len(close)
+    tr = np.empty(n)
+    prev_close = np.nan
+    for i in range(n):
+        r = high[i] - low[i]
+        a = abs(high[i] - prev_close)
+        if math.isnan(r) or a > r:
+            r = a
+        b = abs(low[i] - prev_close)
+        if math.isnan(r) or b > r:
+            r = b
+        tr[i] = r
+        prev_close = close[i]
+    
+    atr = rma_loop(tr, period)
+    basic_upper = np.empty(n)
+    basic_lower = np.empty(n)
+    # Steady-state band loop from bar period unless a band is not finite from period - 1
+    start = period
+    for i in range(n):
+        hl2 = (high[i] + low[i]) / 2.0
+        bu = hl2 + multiplier * atr[i]
+        bl = hl2 - multiplier * atr[i]
+        basic_upper[i] = bu
+        basic_lower[i] = bl
+        if i >= period - 1 and not (math.isfinite(bu) and math.isfinite(bl)):
+            start = n
+    
+    final_upper, final_lower, supertrend, trend = supertrend_loop(basic_upper, basic_lower, close, start)
+    return atr, final_upper, final_lower, supertrend, trend
+
+
+def _warm_up() -> None:
+    """Compile (or load from cache) every kernel so the first real call is fast"""
+    dummy = np.ones(2, dtype=np.float64)
+    ema_last(dummy, 2)
+    ema_series(dummy, 2, np.empty_like(dummy))
+    rma_loop(dummy, 2)
+    supertrend_loop(dummy, dummy, dummy, 1)
+    supertrend_full(dummy, dummy, dummy, 1, 1.0)
+
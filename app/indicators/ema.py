@@ -1,6 +1,8 @@
-import pandas as pd
 import numpy as np
-from typing import List, Optional
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from . import _kernels
 
 
 def validate_candles(candles: List[list]) -> bool:
@@ -29,7 +31,124 @@ def validate_candles(candles: List[list]) -> bool:
     return True
 
 
-def calculate_ema(candles: List[list], period: int = 200) -> float:
+def validate_closes(closes: np.ndarray) -> bool:
+    """
+    Validate a close price array (vectorized)
+    
+    Args:
+        closes: Array of close prices
+        
+    Returns:
+        True if non-empty and every value is finite, False otherwise
+    """
+    return closes.size > 0 and bool(np.isfinite(closes).all())
+
+
+def _timestamps_closes(candles: List[list]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract timestamps and close prices as float64 arrays in chronological order (oldest first)
+    
+    Candles can be in any order; newest-first input (Bybit REST) is reversed,
+    anything else unsorted is sorted by timestamp.
+    
+    Raises:
+        ValueError: If candles are malformed or timestamps/close prices are not numeric
+    """
+    n = len(candles)
+    try:
+        closes = np.fromiter((float(c[4]) for c in candles), dtype=np.float64, count=n)
+        timestamps = np.fromiter((float(c[0]) for c in candles), dtype=np.float64, count=n)
+    except (ValueError, TypeError, IndexError, KeyError) as e:
+        raise ValueError(f"Candle data contains invalid numeric values: {e}")
+    
+    if n > 1:
+        diffs = np.diff(timestamps)
+        if np.all(diffs <= 0):
+            closes = closes[::-1]
+            timestamps = timestamps[::-1]
+        elif not np.all(diffs >= 0):
+            order = np.argsort(timestamps, kind='stable')
+            closes = closes[order]
+            timestamps = timestamps[order]
+    
+    return timestamps, closes
+
+
+def _closes_array(candles: List[list]) -> np.ndarray:
+    """
+    Extract close prices as a float64 array in chronological order (oldest first)
+    
+    Raises:
+        ValueError: If candles are malformed or timestamps/close prices are not numeric
+    """
+    return _timestamps_closes(candles)[1]
+
+
+def _prepare_closes(candles: Union[List[list], np.ndarray]) -> np.ndarray:
+    """
+    Validate input and return chronological float64 closes
+    
+    Accepts OHLCV candles or a 1-D array of closes already in chronological
+    order (e.g. BybitWebSocket.closes_array), which is used without copying.
+    
+    Candle lists are parsed once into the close column and then checked with
+    validate_closes, instead of casting every row twice.
+    
+    Raises:
+        ValueError: If the data is invalid
+    """
+    if isinstance(candles, np.ndarray):
+        if candles.ndim != 1:
+            raise ValueError("Invalid candle data format")
+        closes = candles.astype(np.float64, copy=False)
+    else:
+        if not candles:
+            raise ValueError("Invalid candle data format")
+        try:
+            closes = _closes_array(candles)
+        except ValueError:
+            raise ValueError("Invalid candle data format")
+    
+    if closes.size == 0:
+        raise ValueError("Invalid candle data format")
+    if not validate_closes(closes):
+        raise ValueError("Candle data contains invalid close prices")
+    
+    return closes
+
+
+def _ema_last(closes: np.ndarray, period: int) -> float:
+    """EMA recurrence seeded with the first close, returns the last value"""
+    if _kernels.NUMBA_AVAILABLE:
+        return _kernels.ema_last(closes, period)
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    values = closes.tolist()
+    ema = values[0]
+    for x in values[1:]:
+        ema = alpha * x + beta * ema
+    return ema
+
+
+def _ema_series(closes: np.ndarray, period: int) -> np.ndarray:
+    """EMA recurrence seeded with the first close, returns all values"""
+    if _kernels.NUMBA_AVAILABLE:
+        return _kernels.ema_series(closes, period, np.empty_like(closes))
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    values = closes.tolist()
+    out = np.empty(len(values), dtype=np.float64)
+    if not values:
+        return out
+    ema = values[0]
+    out[0] = ema
+    for i in range(1, len(values)):
+        ema = alpha * values[i] + beta * ema
+        out[i] = ema
+    return out
+
+
+def calculate_ema(candles: Union[List[list], np.ndarray], period: int = 200) -> float:
     """
     Calculate EMA (Exponential Moving Average) - exact TradingView implementation
     
@@ -39,6 +158,7 @@ def calculate_ema(candles: List[list], period: int = 200) -> float:
     Args:
         candles: List of OHLCV candles from Bybit
                  Can be in any order (will be sorted chronologically)
+                 or a 1-D array of closes in chronological order
         period: EMA period (default 200)
     
     Returns:
@@ -48,68 +168,133 @@ def calculate_ema(candles: List[list], period: int = 200) -> float:
         ValueError: If candles are invalid or insufficient
     """
     # Validate input
-    if not validate_candles(candles):
-        raise ValueError("Invalid candle data format")
+    closes = _prepare_closes(candles)
     
-    if len(candles) < period:
-        raise ValueError(f"Need at least {period} candles for EMA{period}, got {len(candles)}")
+    if len(closes) < period:
+        raise ValueError(f"Need at least {period} candles for EMA{period}, got {len(closes)}")
     
     if period < 1:
         raise ValueError(f"Period must be >= 1, got {period}")
     
-    # Create DataFrame
-    columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover']
-    df = pd.DataFrame(candles, columns=columns[:len(candles[0])])
+    # TradingView EMA formula: same as ewm(span=period, adjust=False)
+    result = float(_ema_last(closes, period))
     
-    # Sort by timestamp (chronological order - oldest first)
-    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
-    df = df.sort_values('timestamp').reset_index(drop=True)
+    # Validate output
+    if np.isnan(result):
+        raise ValueError("EMA calculation resulted in NaN")
     
-    # Convert close to float
-    closes = pd.to_numeric(df['close'], errors='coerce').astype(float)
+    return result
+
+
+@dataclass
+class EmaState:
+    """EMA as of one committed candle, for O(1) updates on the next ones"""
+    period: int
+    ema: float
+    last_close: float
+    last_timestamp: float
+
+
+def calculate_ema_stateful(
+    states: Dict[Hashable, EmaState],
+    key: Hashable,
+    candles: Union[List[list], np.ndarray],
+    period: int = 200
+) -> float:
+    """
+    calculate_ema over a candle window that carries state between calls
+    
+    Same contract as calculate_supertrend_incremental: the newest candle may
+    still be live, so it is only evaluated; the cached EMA is advanced over
+    candles once a newer one has appeared. The first call, a period change,
+    or a cached candle missing from the window / with a different close
+    bootstraps from the window (identical to calculate_ema on it).
+    
+    Args:
+        states: EmaState cache keyed by key, updated in place
+        key: Series identifier (e.g. "240")
+        candles: List of OHLCV candles (any order) or a 2-D array in
+                 chronological order (e.g. BybitWebSocket.klines_array)
+        period: EMA period
     
-    # Check for NaN values
-    if closes.isna().any():
+    Returns:
+        EMA value (float) for the most recent candle
+    
+    Raises:
+        ValueError: If candles are invalid or insufficient
+    """
+    if isinstance(candles, np.ndarray):
+        if candles.ndim != 2 or candles.shape[0] == 0 or candles.shape[1] < 5:
+            raise ValueError("Invalid candle data format")
+        timestamps = candles[:, 0].astype(np.float64, copy=False)
+        closes = candles[:, 4].astype(np.float64, copy=False)
+    else:
+        if not candles:
+            raise ValueError("Invalid candle data format")
+        try:
+            timestamps, closes = _timestamps_closes(candles)
+        except ValueError:
+            raise ValueError("Invalid candle data format")
+    if not validate_closes(closes):
         raise ValueError("Candle data contains invalid close prices")
     
-    # TradingView EMA formula: ewm(span=period, adjust=False)
-    ema = closes.ewm(span=period, adjust=False).mean()
+    n = len(closes)
+    if n < period:
+        raise ValueError(f"Need at least {period} candles for EMA{period}, got {n}")
     
-    result = float(ema.iloc[-1])
+    if period < 1:
+        raise ValueError(f"Period must be >= 1, got {period}")
+    
+    alpha = 2.0 / (period + 1.0)
+    beta = 1.0 - alpha
+    
+    state = states.get(key)
+    start = -1
+    if state is not None and state.period == period:
+        idx = int(np.searchsorted(timestamps, state.last_timestamp))
+        if idx < n - 1 and timestamps[idx] == state.last_timestamp and closes[idx] == state.last_close:
+            start = idx + 1
+    
+    if start < 0:
+        if n < 2:
+            return calculate_ema(closes, period)
+        state = EmaState(
+            period=period,
+            ema=float(_ema_last(closes[:-1], period)),
+            last_close=float(closes[-2]),
+            last_timestamp=float(timestamps[-2])
+        )
+        states[key] = state
+    else:
+        ema = state.ema
+        for close in closes[start:n - 1].tolist():
+            ema = alpha * close + beta * ema
+        state.ema = ema
+        state.last_close = float(closes[-2])
+        state.last_timestamp = float(timestamps[-2])
+    
+    result = alpha * float(closes[-1]) + beta * state.ema
     
-    # Validate output
     if np.isnan(result):
+        states.pop(key, None)
         raise ValueError("EMA calculation resulted in NaN")
     
     return result
 
 
-def calculate_ema_series(candles: List[list], period: int = 200) -> List[Optional[float]]:
+def calculate_ema_series(candles: Union[List[list], np.ndarray], period: int = 200) -> List[Optional[float]]:
     """
     Calculate EMA for all candles (for charting)
     
     Args:
-        candles: List of OHLCV candles
+        candles: List of OHLCV candles or a 1-D array of chronological closes
         period: EMA period
     
     Returns:
         List of EMA values for each candle (None for insufficient data points)
     """
-    if not validate_candles(candles):
-        raise ValueError("Invalid candle data format")
-    
-    if len(candles) == 0:
-        return []
-    
-    columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover']
-    df = pd.DataFrame(candles, columns=columns[:len(candles[0])])
-    
-    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    
-    closes = pd.to_numeric(df['close'], errors='coerce').astype(float)
-    
-    ema = closes.ewm(span=period, adjust=False).mean()
+    closes = _prepare_closes(candles)
+    ema = _ema_series(closes, period)
     
     # Return None for first (period-1) values where EMA is not reliable
     result = []
@@ -124,34 +309,23 @@ def calculate_ema_series(candles: List[list], period: int = 200) -> List[Optiona
     return result
 
 
-def calculate_sma(candles: List[list], period: int = 20) -> float:
+def calculate_sma(candles: Union[List[list], np.ndarray], period: int = 20) -> float:
     """
     Calculate SMA (Simple Moving Average)
     
     Args:
-        candles: List of OHLCV candles
+        candles: List of OHLCV candles or a 1-D array of chronological closes
         period: SMA period
     
     Returns:
         SMA value for the most recent candle
     """
-    if not validate_candles(candles):
-        raise ValueError("Invalid candle data format")
-    
-    if len(candles) < period:
-        raise ValueError(f"Need at least {period} candles for SMA{period}, got {len(candles)}")
-    
-    columns = ['timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover']
-    df = pd.DataFrame(candles, columns=columns[:len(candles[0])])
-    
-    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    
-    closes = pd.to_numeric(df['close'], errors='coerce').astype(float)
+    closes = _prepare_closes(candles)
     
-    sma = closes.rolling(window=period).mean()
+    if len(closes) < period:
+        raise ValueError(f"Need at least {period} candles for SMA{period}, got {len(closes)}")
     
-    result = float(sma.iloc[-1])
+    result = float(closes[-period:].mean())
     
     if np.isnan(result):
         raise ValueError("SMA calculation resulted in NaN")
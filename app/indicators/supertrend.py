@@ -1,6 +1,12 @@
 import pandas as pd
 import numpy as np
-from typing import Tuple, List, Optional
+from dataclasses import dataclass
+from typing import Dict, Hashable, Tuple, List, Optional, Union
+
+from ._kernels import NUMBA_AVAILABLE, rma_loop, supertrend_full, supertrend_loop
+
+# Series length from which the no-numba path uses rma_closed_form
+RMA_CLOSED_FORM_MIN = 1024
 
 
 def rma(series: pd.Series, period: int) -> pd.Series:
@@ -9,26 +15,68 @@ def rma(series: pd.Series, period: int) -> pd.Series:
     
     rma[i] = (rma[i-1] * (period - 1) + series[i]) / period
     """
-    rma_result = series.copy().astype(float)
-    rma_result.iloc[:] = np.nan
+    values = series.to_numpy(dtype=np.float64, copy=False)
+    return pd.Series(rma_loop(values, period), index=series.index, name=series.name)
 
-    if len(series) < period:
-        return rma_result
-
-    # First value = SMA
-    first_val = series.iloc[:period].mean()
-    rma_result.iloc[period - 1] = first_val
 
+def rma_closed_form(values: np.ndarray, period: int) -> np.ndarray:
+    """
+    RMA (Wilder) via cumulative sums instead of a serial loop
+    
+    After the seed r0 (NaN-skipping mean of the first period values),
+    r[j] = b^j * (r0 + a * sum(b^-m * v[m], m = 1..j)) with a = 1 / period and
+    b = 1 - a. The sum is one np.cumsum; it is evaluated in blocks short
+    enough that b^-m stays far from overflow. Matches rma_loop to rounding
+    error. Falls back to rma_loop when the data after the seed is not finite,
+    where only the recurrence gives the exact NaN propagation.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n < period or period < 2:
+        return rma_loop(values, period)
+    
+    seed = values[:period]
+    seed = seed[~np.isnan(seed)]
+    r0 = seed.mean() if seed.size else np.nan
+    tail = values[period:]
+    if not (np.isfinite(r0) and np.isfinite(tail).all()):
+        return rma_loop(values, period)
+    
+    out = np.full(n, np.nan)
+    out[period - 1] = r0
     alpha = 1.0 / period
-    for i in range(period, len(series)):
-        rma_result.iloc[i] = alpha * series.iloc[i] + (1 - alpha) * rma_result.iloc[i - 1]
+    beta = 1.0 - alpha
+    block = max(1, int(300.0 / -np.log10(beta)))  # b^-block <= 1e300
+    
+    prev = r0
+    for start in range(0, len(tail), block):
+        chunk = tail[start:start + block]
+        powers = beta ** np.arange(1, len(chunk) + 1)
+        acc = prev + alpha * np.cumsum(chunk / powers)
+        res = powers * acc
+        out[period + start:period + start + len(chunk)] = res
+        prev = res[-1]
+    return out
 
-    return rma_result
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    True Range as a float64 array
+    
+    tr[i] = max(high - low, |high - close[i-1]|, |low - close[i-1]|)
+    
+    NaN terms are skipped like pandas' row-wise max, so the first bar (no
+    previous close) is just high - low.
+    """
+    prev_close = np.empty_like(close)
+    prev_close[0] = np.nan
+    prev_close[1:] = close[:-1]
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
 
 
 def validate_candles(candles: List[list]) -> bool:
     """
-    Validate candle data format
+    Validate candle data format (same parse as the SuperTrend calculation)
     
     Args:
         candles: List of candles
@@ -36,28 +84,121 @@ def validate_candles(candles: List[list]) -> bool:
     Returns:
         True if valid, False otherwise
     """
-    if not candles:
+    try:
+        _ohlc_arrays(candles)
+    except ValueError:
         return False
+    return True
+
+
+def _float_or_nan(value) -> float:
+    """float(value), or NaN if it is not numeric"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+def _ohlc_arrays(
+    candles: Union[List[list], np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Parse candles into chronological float64 timestamp, high, low and close arrays
+    
+    Accepts a list of OHLCV candles (lists or tuples, any order) or a 2-D
+    array with at least [timestamp, open, high, low, close] columns. Rows are
+    sorted by timestamp; non-numeric timestamps sort last.
     
-    for candle in candles:
-        if not isinstance(candle, (list, tuple)):
-            return False
-        if len(candle) < 5:
-            return False
-        # Check if OHLC values are numeric
+    Raises:
+        ValueError: If the candle data format is invalid
+    """
+    if isinstance(candles, np.ndarray):
+        if candles.ndim != 2 or candles.shape[0] == 0 or candles.shape[1] < 5:
+            raise ValueError("Invalid candle data format")
+        try:
+            timestamps = candles[:, 0].astype(np.float64)
+            ohlc = candles[:, 1:5].astype(np.float64)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid candle data format")
+    else:
+        if not candles or not all(isinstance(c, (list, tuple)) for c in candles):
+            raise ValueError("Invalid candle data format")
+        n = len(candles)
         try:
-            float(candle[1])  # open
-            float(candle[2])  # high
-            float(candle[3])  # low
-            float(candle[4])  # close
-        except (ValueError, TypeError, IndexError):
-            return False
+            # One pass over the rows for timestamp + OHLC
+            block = np.fromiter(
+                (float(x) for c in candles for x in c[:5]), dtype=np.float64, count=5 * n
+            ).reshape(n, 5)
+            timestamps = block[:, 0]
+            ohlc = block[:, 1:]
+        except (ValueError, TypeError):
+            # OHLC must be numeric; non-numeric timestamps are coerced to NaN
+            try:
+                ohlc = np.fromiter(
+                    (float(x) for c in candles for x in c[1:5]), dtype=np.float64, count=4 * n
+                ).reshape(n, 4)
+            except (ValueError, TypeError):
+                raise ValueError("Invalid candle data format")
+            timestamps = np.fromiter((_float_or_nan(c[0]) for c in candles), dtype=np.float64, count=n)
     
-    return True
+    # Sort by timestamp (chronological order - oldest first)
+    if timestamps.size > 1 and not np.all(np.diff(timestamps) >= 0):
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        ohlc = ohlc[order]
+    
+    return timestamps, ohlc[:, 1].copy(), ohlc[:, 2].copy(), ohlc[:, 3].copy()
+
+
+def _supertrend_arrays(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    period: int,
+    multiplier: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Shared SuperTrend pipeline on chronological float64 arrays
+    
+    Returns:
+        Tuple of ATR, final upper band, final lower band, SuperTrend line and
+        trend (1 = up, -1 = down) per bar
+    """
+    # One compiled pass: true range, ATR, bands and the trend recurrence
+    if NUMBA_AVAILABLE:
+        return supertrend_full(high, low, close, period, float(multiplier))
+    
+    # ATR calculation with RMA (TradingView style)
+    tr = true_range(high, low, close)
+    # Without numba the kernels run as plain Python, where list indexing is
+    # much cheaper than ndarray scalar indexing, and long series use the
+    # vectorized closed form instead of the serial loop
+    if len(tr) >= RMA_CLOSED_FORM_MIN:
+        atr = rma_closed_form(tr, period)
+    else:
+        atr = rma_loop(tr.tolist(), period)
+    
+    # hl2 and basic bands
+    hl2 = (high + low) / 2.0
+    basic_upper_band = hl2 + multiplier * atr
+    basic_lower_band = hl2 - multiplier * atr
+    
+    # ATR is valid from bar period - 1, so the band loop can drop its NaN
+    # guards from bar period on unless the data itself has gaps (NaN prices)
+    n = len(close)
+    start = period
+    if not (np.isfinite(basic_upper_band[period - 1:]).all() and np.isfinite(basic_lower_band[period - 1:]).all()):
+        start = n
+    
+    # Band/trend recurrence
+    final_upper, final_lower, supertrend, trend = supertrend_loop(
+        basic_upper_band.tolist(), basic_lower_band.tolist(), close.tolist(), start
+    )
+    return atr, final_upper, final_lower, supertrend, trend
 
 
 def calculate_supertrend(
-    candles: List[list],
+    candles: Union[List[list], np.ndarray],
     period: int = 10,
     multiplier: float = 3.0
 ) -> Tuple[str, float]:
@@ -67,6 +208,7 @@ def calculate_supertrend(
     Args:
         candles: List of OHLCV candles [timestamp, open, high, low, close, volume, turnover]
                  Can be in any order (will be sorted chronologically)
+                 or a 2-D array with the same column layout
         period: ATR period (default 10)
         multiplier: ATR multiplier (default 3.0)
     
@@ -79,11 +221,10 @@ def calculate_supertrend(
         ValueError: If candles are invalid or insufficient
     """
     # Validate input
-    if not validate_candles(candles):
-        raise ValueError("Invalid candle data format")
+    _, high, low, close = _ohlc_arrays(candles)
     
-    if len(candles) < period + 1:
-        raise ValueError(f"Need at least {period + 1} candles for SuperTrend calculation, got {len(candles)}")
+    if len(close) < period + 1:
+        raise ValueError(f"Need at least {period + 1} candles for SuperTrend calculation, got {len(close)}")
     
     if period < 1:
         raise ValueError(f"Period must be >= 1, got {period}")
@@ -91,100 +232,14 @@ def calculate_supertrend(
     if multiplier <= 0:
         raise ValueError(f"Multiplier must be > 0, got {multiplier}")
     
-    # Create DataFrame
-    df = pd.DataFrame(candles, columns=[
-        'timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-    ][:len(candles[0])])  # Handle variable column count
-    
-    # Sort by timestamp (chronological order - oldest first)
-    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    
-    # Convert to float
-    df['high'] = pd.to_numeric(df['high'], errors='coerce').astype(float)
-    df['low'] = pd.to_numeric(df['low'], errors='coerce').astype(float)
-    df['close'] = pd.to_numeric(df['close'], errors='coerce').astype(float)
-    
     # Check for NaN values after conversion
-    if df[['high', 'low', 'close']].isna().any().any():
+    if np.isnan(high).any() or np.isnan(low).any() or np.isnan(close).any():
         raise ValueError("Candle data contains invalid numeric values")
     
-    # ATR calculation with RMA (TradingView style)
-    high_low = df['high'] - df['low']
-    high_close = (df['high'] - df['close'].shift(1)).abs()
-    low_close = (df['low'] - df['close'].shift(1)).abs()
-    
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = rma(tr, period)
-    
-    # hl2 and basic bands
-    hl2 = (df['high'] + df['low']) / 2.0
-    basic_upper_band = hl2 + multiplier * atr
-    basic_lower_band = hl2 - multiplier * atr
-    
-    # Initialize series
-    final_upper_band = pd.Series(index=df.index, dtype=float)
-    final_lower_band = pd.Series(index=df.index, dtype=float)
-    supertrend = pd.Series(index=df.index, dtype=float)
-    trend = pd.Series(index=df.index, dtype=int)  # 1 = UP, -1 = DOWN
-    
-    for i in range(len(df)):
-        if i == 0:
-            final_upper_band.iloc[i] = basic_upper_band.iloc[i]
-            final_lower_band.iloc[i] = basic_lower_band.iloc[i]
-            trend.iloc[i] = 1
-            supertrend.iloc[i] = final_lower_band.iloc[i]
-            continue
-        
-        # Final upper band
-        prev_final_upper = final_upper_band.iloc[i - 1]
-        prev_close = df['close'].iloc[i - 1]
-        bu = basic_upper_band.iloc[i]
-        
-        if np.isnan(prev_final_upper):
-            final_upper_band.iloc[i] = bu
-        else:
-            if bu < prev_final_upper or prev_close > prev_final_upper:
-                final_upper_band.iloc[i] = bu
-            else:
-                final_upper_band.iloc[i] = prev_final_upper
-        
-        # Final lower band
-        prev_final_lower = final_lower_band.iloc[i - 1]
-        bl = basic_lower_band.iloc[i]
-        
-        if np.isnan(prev_final_lower):
-            final_lower_band.iloc[i] = bl
-        else:
-            if bl > prev_final_lower or prev_close < prev_final_lower:
-                final_lower_band.iloc[i] = bl
-            else:
-                final_lower_band.iloc[i] = prev_final_lower
-        
-        # Trend decision
-        curr_close = df['close'].iloc[i]
-        
-        if curr_close > final_upper_band.iloc[i - 1]:
-            trend.iloc[i] = 1
-        elif curr_close < final_lower_band.iloc[i - 1]:
-            trend.iloc[i] = -1
-        else:
-            trend.iloc[i] = trend.iloc[i - 1]
-            
-            # Band locking (TradingView behavior)
-            if trend.iloc[i] == 1 and final_lower_band.iloc[i] < final_lower_band.iloc[i - 1]:
-                final_lower_band.iloc[i] = final_lower_band.iloc[i - 1]
-            if trend.iloc[i] == -1 and final_upper_band.iloc[i] > final_upper_band.iloc[i - 1]:
-                final_upper_band.iloc[i] = final_upper_band.iloc[i - 1]
-        
-        # SuperTrend value
-        if trend.iloc[i] == 1:
-            supertrend.iloc[i] = final_lower_band.iloc[i]
-        else:
-            supertrend.iloc[i] = final_upper_band.iloc[i]
+    _, _, _, supertrend, trend = _supertrend_arrays(high, low, close, period, multiplier)
     
-    last_trend = trend.iloc[-1]
-    last_value = float(supertrend.iloc[-1])
+    last_trend = trend[-1]
+    last_value = float(supertrend[-1])
     
     # Validate output
     if np.isnan(last_value):
@@ -195,7 +250,7 @@ def calculate_supertrend(
 
 
 def calculate_supertrend_series(
-    candles: List[list],
+    candles: Union[List[list], np.ndarray],
     period: int = 10,
     multiplier: float = 3.0
 ) -> Tuple[List[str], List[float]]:
@@ -207,91 +262,187 @@ def calculate_supertrend_series(
         - directions: List of "green"/"red" for each candle
         - values: List of SuperTrend values for each candle
     """
-    if not validate_candles(candles):
-        raise ValueError("Invalid candle data format")
+    _, high, low, close = _ohlc_arrays(candles)
     
-    if len(candles) < period + 1:
+    if len(close) < period + 1:
         return [], []
     
-    # Similar calculation as above but return full series
-    df = pd.DataFrame(candles, columns=[
-        'timestamp', 'open', 'high', 'low', 'close', 'volume', 'turnover'
-    ][:len(candles[0])])
-    
-    df['timestamp'] = pd.to_numeric(df['timestamp'], errors='coerce')
-    df = df.sort_values('timestamp').reset_index(drop=True)
-    
-    df['high'] = pd.to_numeric(df['high'], errors='coerce').astype(float)
-    df['low'] = pd.to_numeric(df['low'], errors='coerce').astype(float)
-    df['close'] = pd.to_numeric(df['close'], errors='coerce').astype(float)
+    _, _, _, supertrend, trend = _supertrend_arrays(high, low, close, period, multiplier)
     
-    high_low = df['high'] - df['low']
-    high_close = (df['high'] - df['close'].shift(1)).abs()
-    low_close = (df['low'] - df['close'].shift(1)).abs()
+    directions = np.where(trend == 1, "green", "red").tolist()
+    values = supertrend.astype(object)
+    values[np.isnan(supertrend)] = None
+    values = values.tolist()
     
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    atr = rma(tr, period)
-    
-    hl2 = (df['high'] + df['low']) / 2.0
-    basic_upper_band = hl2 + multiplier * atr
-    basic_lower_band = hl2 - multiplier * atr
+    return directions, values
+
+
+@dataclass
+class SuperTrendState:
+    """
+    SuperTrend recurrence state after one candle, for O(1) updates
     
-    final_upper_band = pd.Series(index=df.index, dtype=float)
-    final_lower_band = pd.Series(index=df.index, dtype=float)
-    supertrend = pd.Series(index=df.index, dtype=float)
-    trend = pd.Series(index=df.index, dtype=int)
-    
-    for i in range(len(df)):
-        if i == 0:
-            final_upper_band.iloc[i] = basic_upper_band.iloc[i]
-            final_lower_band.iloc[i] = basic_lower_band.iloc[i]
-            trend.iloc[i] = 1
-            supertrend.iloc[i] = final_lower_band.iloc[i]
-            continue
+    Holds exactly what the band/trend loop carries from one bar to the next,
+    so update() on a new closed candle gives the same result as re-running
+    calculate_supertrend on the full history.
+    """
+    period: int
+    multiplier: float
+    atr: float
+    final_upper: float
+    final_lower: float
+    trend: int  # 1 = UP, -1 = DOWN
+    last_close: float
+    last_timestamp: float
+    
+    @classmethod
+    def from_arrays(
+        cls,
+        timestamps: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        period: int,
+        multiplier: float
+    ) -> "SuperTrendState":
+        """Cold start: run the full pipeline and keep the state of the last bar"""
+        atr, final_upper, final_lower, _, trend = _supertrend_arrays(high, low, close, period, multiplier)
+        return cls(
+            period=period,
+            multiplier=multiplier,
+            atr=float(atr[-1]),
+            final_upper=float(final_upper[-1]),
+            final_lower=float(final_lower[-1]),
+            trend=int(trend[-1]),
+            last_close=float(close[-1]),
+            last_timestamp=float(timestamps[-1])
+        )
+    
+    def _step(self, high: float, low: float, close: float) -> Tuple[float, float, float, int]:
+        """One RMA step and one band/trend iteration (same rules as supertrend_loop)"""
+        prev_close = self.last_close
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        alpha = 1.0 / self.period
+        atr = alpha * tr + (1.0 - alpha) * self.atr
         
-        prev_final_upper = final_upper_band.iloc[i - 1]
-        prev_close = df['close'].iloc[i - 1]
-        bu = basic_upper_band.iloc[i]
+        hl2 = (high + low) / 2.0
+        bu = hl2 + self.multiplier * atr
+        bl = hl2 - self.multiplier * atr
+        prev_upper = self.final_upper
+        prev_lower = self.final_lower
         
-        if np.isnan(prev_final_upper):
-            final_upper_band.iloc[i] = bu
+        if np.isnan(prev_upper) or bu < prev_upper or prev_close > prev_upper:
+            final_upper = bu
         else:
-            if bu < prev_final_upper or prev_close > prev_final_upper:
-                final_upper_band.iloc[i] = bu
-            else:
-                final_upper_band.iloc[i] = prev_final_upper
-        
-        prev_final_lower = final_lower_band.iloc[i - 1]
-        bl = basic_lower_band.iloc[i]
+            final_upper = prev_upper
         
-        if np.isnan(prev_final_lower):
-            final_lower_band.iloc[i] = bl
+        if np.isnan(prev_lower) or bl > prev_lower or prev_close < prev_lower:
+            final_lower = bl
         else:
-            if bl > prev_final_lower or prev_close < prev_final_lower:
-                final_lower_band.iloc[i] = bl
-            else:
-                final_lower_band.iloc[i] = prev_final_lower
-        
-        curr_close = df['close'].iloc[i]
+            final_lower = prev_lower
         
-        if curr_close > final_upper_band.iloc[i - 1]:
-            trend.iloc[i] = 1
-        elif curr_close < final_lower_band.iloc[i - 1]:
-            trend.iloc[i] = -1
+        if close > prev_upper:
+            trend = 1
+        elif close < prev_lower:
+            trend = -1
         else:
-            trend.iloc[i] = trend.iloc[i - 1]
+            trend = self.trend
             
-            if trend.iloc[i] == 1 and final_lower_band.iloc[i] < final_lower_band.iloc[i - 1]:
-                final_lower_band.iloc[i] = final_lower_band.iloc[i - 1]
-            if trend.iloc[i] == -1 and final_upper_band.iloc[i] > final_upper_band.iloc[i - 1]:
-                final_upper_band.iloc[i] = final_upper_band.iloc[i - 1]
+            # Band locking (TradingView behavior)
+            if trend == 1 and final_lower < prev_lower:
+                final_lower = prev_lower
+            if trend == -1 and final_upper > prev_upper:
+                final_upper = prev_upper
         
-        if trend.iloc[i] == 1:
-            supertrend.iloc[i] = final_lower_band.iloc[i]
-        else:
-            supertrend.iloc[i] = final_upper_band.iloc[i]
+        return atr, final_upper, final_lower, trend
     
-    directions = ["green" if t == 1 else "red" for t in trend]
-    values = [float(v) if not np.isnan(v) else None for v in supertrend]
+    def peek(self, high: float, low: float, close: float) -> Tuple[str, float]:
+        """Direction and SuperTrend value for a candle without advancing the state"""
+        _, final_upper, final_lower, trend = self._step(high, low, close)
+        value = final_lower if trend == 1 else final_upper
+        return ("green" if trend == 1 else "red"), value
     
-    return directions, values
+    def update(self, high: float, low: float, close: float, timestamp: float) -> Tuple[str, float]:
+        """
+        Advance the state by one closed candle
+        
+        Returns:
+            Tuple of direction ("green"/"red") and SuperTrend value on that candle
+        """
+        self.atr, self.final_upper, self.final_lower, self.trend = self._step(high, low, close)
+        self.last_close = close
+        self.last_timestamp = timestamp
+        value = self.final_lower if self.trend == 1 else self.final_upper
+        return ("green" if self.trend == 1 else "red"), value
+
+
+def calculate_supertrend_incremental(
+    states: Dict[Hashable, SuperTrendState],
+    key: Hashable,
+    candles: Union[List[list], np.ndarray],
+    period: int = 10,
+    multiplier: float = 3.0
+) -> Tuple[str, float]:
+    """
+    calculate_supertrend that carries state between calls
+    
+    The newest candle may still be live, so it is only evaluated (peek); the
+    cached state is advanced over candles once a newer one has appeared. A
+    cold start (full calculation) is done on the first call, when period or
+    multiplier change, or when the cached candle is missing from the window or
+    has a different close (gap, revised data).
+    
+    The ATR keeps its history beyond the candle window, so once warm the
+    result can differ slightly from calculate_supertrend on the same window.
+    
+    Args:
+        states: SuperTrendState cache keyed by key, updated in place
+        key: Series identifier (e.g. "240")
+        candles: OHLCV candles (any order) or a 2-D array
+        period: ATR period
+        multiplier: ATR multiplier
+    
+    Returns:
+        Tuple of direction ("green"/"red") and SuperTrend value on the newest candle
+    
+    Raises:
+        ValueError: If candles are invalid or insufficient
+    """
+    timestamps, high, low, close = _ohlc_arrays(candles)
+    n = len(close)
+    
+    if n < period + 1:
+        raise ValueError(f"Need at least {period + 1} candles for SuperTrend calculation, got {n}")
+    
+    if period < 1:
+        raise ValueError(f"Period must be >= 1, got {period}")
+    
+    if multiplier <= 0:
+        raise ValueError(f"Multiplier must be > 0, got {multiplier}")
+    
+    if np.isnan(high).any() or np.isnan(low).any() or np.isnan(close).any():
+        raise ValueError("Candle data contains invalid numeric values")
+    
+    state = states.get(key)
+    start = -1
+    if state is not None and state.period == period and state.multiplier == multiplier:
+        idx = int(np.searchsorted(timestamps, state.last_timestamp))
+        if idx < n - 1 and timestamps[idx] == state.last_timestamp and close[idx] == state.last_close:
+            start = idx + 1
+    
+    if start < 0:
+        state = SuperTrendState.from_arrays(
+            timestamps[:-1], high[:-1], low[:-1], close[:-1], period, multiplier
+        )
+        states[key] = state
+    else:
+        for i in range(start, n - 1):
+            state.update(float(high[i]), float(low[i]), float(close[i]), float(timestamps[i]))
+    
+    direction, value = state.peek(float(high[-1]), float(low[-1]), float(close[-1]))
+    
+    if np.isnan(value):
+        states.pop(key, None)
+        raise ValueError("SuperTrend calculation resulted in NaN")
+    
+    return direction, float(value)
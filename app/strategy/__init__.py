@@ -1,5 +1,5 @@
 from app.strategy.trend_filter import TrendFilter
 from app.strategy.contrarian_entry import ContrarianEntry
-from app.strategy.state_machine import SymbolState
+from app.strategy.state_machine import SymbolState, Trend, StDir, Side
 
-__all__ = ['TrendFilter', 'ContrarianEntry', 'SymbolState']
+__all__ = ['TrendFilter', 'ContrarianEntry', 'SymbolState', 'Trend', 'StDir', 'Side']
@@ -2,6 +2,16 @@ from typing import Optional, Literal
 
 SignalType = Literal["LONG", "SHORT"]
 
+# Decision tables for the per-tick checks (one hash lookup instead of chained compares)
+# (trend_4h, st_1h_direction) -> entry signal
+_ENTRY = {("BULLISH", "red"): "LONG", ("BEARISH", "green"): "SHORT"}
+# (position_side, st_4h_direction): ST already opposite to position
+_EXIT_IMMEDIATE = frozenset({("LONG", "red"), ("SHORT", "green")})
+# (position_side, st_4h_prev_direction, st_4h_direction): ST flipped against position
+_EXIT_FLIP = frozenset({("LONG", "green", "red"), ("SHORT", "red", "green")})
+# (position_side, trend_4h, st_4h_direction): trend still valid for position
+_TP = frozenset({("LONG", "BULLISH", "green"), ("SHORT", "BEARISH", "red")})
+
 
 class ContrarianEntry:
     """
@@ -35,20 +45,9 @@ class ContrarianEntry:
             "SHORT" if should enter short
             None if no signal
         """
-        if not trend_4h or not st_1h_direction:
-            return None
-        
-        # LONG when 1H shows RED (opposite of bullish trend)
-        # This means price is pulling back in an uptrend - buy the dip
-        if trend_4h == "BULLISH" and st_1h_direction == "red":
-            return "LONG"
-        
-        # SHORT when 1H shows GREEN (opposite of bearish trend)
-        # This means price is bouncing in a downtrend - sell the rip
-        elif trend_4h == "BEARISH" and st_1h_direction == "green":
-            return "SHORT"
-        
-        return None
+        # LONG when 1H shows RED (opposite of bullish trend) - buy the dip
+        # SHORT when 1H shows GREEN (opposite of bearish trend) - sell the rip
+        return _ENTRY.get((trend_4h, st_1h_direction))
     
     @staticmethod
     def check_exit_signal(
@@ -73,35 +72,13 @@ class ContrarianEntry:
         Returns:
             True if should exit, False otherwise
         """
-        if not position_side or not st_4h_direction:
-            return False
-        
         # ===== FIX: Check 1 - Immediate exit if ST is opposite to position =====
         # This catches cases where we missed the flip or position was opened manually
-        if position_side == "LONG" and st_4h_direction == "red":
-            return True
-        
-        if position_side == "SHORT" and st_4h_direction == "green":
+        if (position_side, st_4h_direction) in _EXIT_IMMEDIATE:
             return True
         
         # ===== Check 2 - Traditional flip detection =====
-        # Only check if we have previous direction
-        if not st_4h_prev_direction:
-            return False
-        
-        if position_side == "LONG":
-            # Exit when 4H ST flips from green to red (trend reversal)
-            flip_to_bearish = (st_4h_prev_direction == "green" and 
-                              st_4h_direction == "red")
-            return flip_to_bearish
-        
-        elif position_side == "SHORT":
-            # Exit when 4H ST flips from red to green (trend reversal)
-            flip_to_bullish = (st_4h_prev_direction == "red" and 
-                              st_4h_direction == "green")
-            return flip_to_bullish
-        
-        return False
+        return (position_side, st_4h_prev_direction, st_4h_direction) in _EXIT_FLIP
     
     @staticmethod
     def should_place_tp(
@@ -122,18 +99,8 @@ class ContrarianEntry:
         Returns:
             True if TP should be placed, False otherwise
         """
-        if not position_side:
-            return False
-        
-        # For LONG: place TP if trend is still bullish
-        if position_side == "LONG":
-            return trend_4h == "BULLISH" and st_4h_direction == "green"
-        
-        # For SHORT: place TP if trend is still bearish
-        if position_side == "SHORT":
-            return trend_4h == "BEARISH" and st_4h_direction == "red"
-        
-        return False
+        # LONG: trend still bullish, SHORT: trend still bearish
+        return (position_side, trend_4h, st_4h_direction) in _TP
     
     @staticmethod
     def get_signal_strength(
@@ -166,8 +133,8 @@ class ContrarianEntry:
         if not ema200_4h or ema200_4h <= 0:
             return 1
         
-        # Calculate distance from EMA as percentage
-        ema_distance_pct = abs((close_price - ema200_4h) / ema200_4h) * 100
+        # Distance from EMA, compared against 5% / 2% of the EMA (no division)
+        ema_distance = abs(close_price - ema200_4h)
         
         # For LONG signals (bullish trend):
         # - Strong: price well above EMA (>5%) - trend very established
@@ -179,9 +146,9 @@ class ContrarianEntry:
         # - Medium: price near EMA (2-5%)
         # - Weak: price barely below EMA (<2%)
         
-        if ema_distance_pct >= 5:
+        if ema_distance >= 0.05 * ema200_4h:
             return 3
-        elif ema_distance_pct >= 2:
+        elif ema_distance >= 0.02 * ema200_4h:
             return 2
         else:
             return 1
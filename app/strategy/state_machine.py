@@ -1,13 +1,48 @@
 from dataclasses import dataclass, field
-from typing import Optional
+from enum import IntEnum
+from typing import Dict, Optional
 from datetime import datetime
 
+from app.indicators.ema import EmaState
+from app.indicators.supertrend import SuperTrendState
 
-@dataclass
+
+class Trend(IntEnum):
+    """4H trend as a sign: opposite trends multiply to -1"""
+    BEARISH = -1
+    NEUTRAL = 0
+    BULLISH = 1
+
+
+class StDir(IntEnum):
+    """SuperTrend direction as a sign"""
+    RED = -1
+    GREEN = 1
+
+
+class Side(IntEnum):
+    """Position side as a sign"""
+    SHORT = -1
+    LONG = 1
+
+
+# String -> sign mapping, applied once when state is updated (unknown/None -> 0)
+TREND_SIGNS = {"BULLISH": Trend.BULLISH, "BEARISH": Trend.BEARISH, "NEUTRAL": Trend.NEUTRAL}
+ST_DIR_SIGNS = {"green": StDir.GREEN, "red": StDir.RED}
+SIDE_SIGNS = {"LONG": Side.LONG, "SHORT": Side.SHORT}
+
+# Price move from entry (percent) after which a ticker update triggers an exit check
+EXIT_CHECK_MOVE_PCT = 0.5
+
+
+@dataclass(slots=True)
 class SymbolState:
     """
     State tracking for each trading symbol
     
+    Uses __slots__ (no per-instance __dict__), so only the declared fields can
+    be set.
+    
     Thread Safety:
     - All state modifications should be done through methods
     - Use asyncio.Lock() in bot_controller for concurrent access
@@ -32,6 +67,8 @@ class SymbolState:
     position_size: Optional[float] = None
     entry_price: Optional[float] = None
     entry_time: Optional[datetime] = None
+    # Absolute price distance from entry_price for EXIT_CHECK_MOVE_PCT (set on open)
+    exit_check_distance: float = 0.0
     
     # Stats
     total_trades: int = 0
@@ -46,8 +83,27 @@ class SymbolState:
     last_processed_1h_candle: Optional[int] = None  # Timestamp of last processed 1H candle
     last_processed_4h_candle: Optional[int] = None  # Timestamp of last processed 4H candle
     
-    def update_trend_4h(self, trend: str, ema200: float, st_dir: str, st_val: float):
-        """Update 4H trend information"""
+    # Incremental indicator state per interval ("240", "60"), advanced one
+    # closed candle at a time instead of recomputing over the whole window
+    supertrend_states: Dict[str, SuperTrendState] = field(default_factory=dict)
+    ema_states: Dict[str, EmaState] = field(default_factory=dict)
+    
+    # Integer signs of the string fields above (0 = unset), kept in sync by the
+    # update methods so hot-path checks are integer compares
+    trend_4h_sign: int = 0
+    st_4h_sign: int = 0
+    st_1h_sign: int = 0
+    position_sign: int = 0
+    
+    def update_trend_4h(
+        self,
+        trend: str,
+        ema200: float,
+        st_dir: str,
+        st_val: float,
+        now: Optional[datetime] = None
+    ):
+        """Update 4H trend information (now: caller's cached tick time)"""
         # ===== FIX 5.2: Initialize st_4h_prev_direction correctly =====
         # Save previous direction before updating
         # If this is the first update (st_4h_direction is None), set prev to current
@@ -60,15 +116,18 @@ class SymbolState:
         self.ema200_4h = ema200
         self.st_4h_direction = st_dir
         self.st_4h_value = st_val
-        self.last_4h_update = datetime.now()
+        self.last_4h_update = now or datetime.now()
+        self.trend_4h_sign = TREND_SIGNS.get(trend, 0)
+        self.st_4h_sign = ST_DIR_SIGNS.get(st_dir, 0)
     
     def update_1h_signal(self, st_dir: str, st_val: float):
         """Update 1H signal information"""
         self.st_1h_prev_direction = self.st_1h_direction
         self.st_1h_direction = st_dir
         self.st_1h_value = st_val
+        self.st_1h_sign = ST_DIR_SIGNS.get(st_dir, 0)
     
-    def open_position(self, side: str, size: float, price: float):
+    def open_position(self, side: str, size: float, price: float, now: Optional[datetime] = None):
         """
         Open new position
         
@@ -76,6 +135,7 @@ class SymbolState:
             side: "LONG" or "SHORT"
             size: Position size in base currency
             price: Entry price
+            now: Entry time (defaults to datetime.now())
         """
         if side not in ["LONG", "SHORT"]:
             raise ValueError(f"Invalid side: {side}. Must be 'LONG' or 'SHORT'")
@@ -87,9 +147,11 @@ class SymbolState:
             raise ValueError(f"Invalid price: {price}. Must be positive")
         
         self.position_side = side
+        self.position_sign = SIDE_SIGNS[side]
         self.position_size = size
         self.entry_price = price
-        self.entry_time = datetime.now()
+        self.exit_check_distance = price * EXIT_CHECK_MOVE_PCT / 100
+        self.entry_time = now or datetime.now()
         self.partial_tp_done = False
         self.tp_limit_order_id = None
     
@@ -138,8 +200,10 @@ class SymbolState:
         ===== FIX: Added this method to properly reset all position-related state =====
         """
         self.position_side = None
+        self.position_sign = 0
         self.position_size = None
         self.entry_price = None
+        self.exit_check_distance = 0.0
         self.entry_time = None
         self.partial_tp_done = False
         self.tp_limit_order_id = None
@@ -160,10 +224,7 @@ class SymbolState:
         if current_price <= 0:
             return 0.0
         
-        if self.position_side == "LONG":
-            return (current_price - self.entry_price) * self.position_size
-        else:
-            return (self.entry_price - current_price) * self.position_size
+        return self.position_sign * (current_price - self.entry_price) * self.position_size
     
     def get_unrealized_pnl_percent(self, current_price: float) -> float:
         """
@@ -181,10 +242,7 @@ class SymbolState:
         if current_price <= 0 or self.entry_price <= 0:
             return 0.0
         
-        if self.position_side == "LONG":
-            return ((current_price - self.entry_price) / self.entry_price) * 100
-        else:
-            return ((self.entry_price - current_price) / self.entry_price) * 100
+        return self.position_sign * ((current_price - self.entry_price) / self.entry_price) * 100
     
     def has_position(self) -> bool:
         """Check if there's an open position"""
@@ -193,21 +251,27 @@ class SymbolState:
     def get_status_dict(self) -> dict:
         """Get current state as dictionary"""
         win_rate = self.winning_trades / self.total_trades if self.total_trades > 0 else 0
+        ema200_4h = self.ema200_4h
+        st_4h_value = self.st_4h_value
+        st_1h_value = self.st_1h_value
+        entry_price = self.entry_price
         
+        # Builtin round() per field: building an array for np.round costs more
+        # than the four scalar calls it would replace
         return {
             "symbol": self.symbol,
             "trend_4h": self.trend_4h,
-            "ema200_4h": round(self.ema200_4h, 2) if self.ema200_4h else None,
+            "ema200_4h": round(ema200_4h, 2) if ema200_4h else None,
             "st_4h": self.st_4h_direction,
-            "st_4h_value": round(self.st_4h_value, 2) if self.st_4h_value else None,
+            "st_4h_value": round(st_4h_value, 2) if st_4h_value else None,
             "st_4h_prev": self.st_4h_prev_direction,
             "st_1h": self.st_1h_direction,
-            "st_1h_value": round(self.st_1h_value, 2) if self.st_1h_value else None,
+            "st_1h_value": round(st_1h_value, 2) if st_1h_value else None,
             "st_1h_prev": self.st_1h_prev_direction,
-            "is_contrarian": self._is_contrarian(),
+            "is_contrarian": self.trend_4h_sign * self.st_1h_sign == -1,
             "position": self.position_side,
             "position_size": self.position_size,
-            "entry_price": round(self.entry_price, 2) if self.entry_price else None,
+            "entry_price": round(entry_price, 2) if entry_price else None,
             "entry_time": self.entry_time.isoformat() if self.entry_time else None,
             "partial_tp_done": self.partial_tp_done,
             "total_trades": self.total_trades,
@@ -217,13 +281,8 @@ class SymbolState:
     
     def _is_contrarian(self) -> bool:
         """Check if current 1H shows contrarian signal"""
-        if not self.trend_4h or not self.st_1h_direction:
-            return False
-        
-        return (
-            (self.trend_4h == "BULLISH" and self.st_1h_direction == "red") or
-            (self.trend_4h == "BEARISH" and self.st_1h_direction == "green")
-        )
+        # BULLISH + red or BEARISH + green; NEUTRAL/unset signs are 0
+        return self.trend_4h_sign * self.st_1h_sign == -1
     
     def __repr__(self) -> str:
         """String representation for debugging"""
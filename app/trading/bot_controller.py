@@ -1,19 +1,154 @@
 import asyncio
 import json
+import functools
 import logging
+import time
 from collections import deque
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, Optional, List, Any
-from decimal import Decimal, ROUND_DOWN
+from typing import Deque, Dict, Optional, List, Any, Sequence, Set, Tuple
+from decimal import Decimal
 
-from app.config import config
+from app.config import get_config
 from app.strategy import TrendFilter, ContrarianEntry, SymbolState
-from app.exchange import BybitClient, BybitWebSocket
-from app.indicators import calculate_supertrend, calculate_ema
+from app.strategy.state_machine import SIDE_SIGNS
+from app.exchange import BybitClient, create_websocket
+from app.indicators import calculate_supertrend_incremental, calculate_ema_stateful
+from app.indicators import _kernels
+
+try:
+    import orjson
+except ImportError:  # orjson is optional - fall back to stdlib json
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Equity/trade points kept in memory (the JSONL files hold the full log until compaction)
+_HISTORY_MAX = 1000
+# Append-only history files are rewritten with the in-memory window past this many lines
+_HISTORY_COMPACT_LINES = 2000
+# Seconds pending history entries wait so that bursts of events share one write
+_HISTORY_FLUSH_DELAY = 1.0
+
+# Maximum simultaneously open positions across all symbols
+_MAX_OPEN_POSITIONS = 8
+
+
+def _dump_line(obj) -> bytes:
+    """Serialize one history entry as a JSON line"""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8') + b"\n"
+
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _read_jsonl_tail(path: Path, limit: int) -> Tuple[Deque[Dict], int]:
+    """
+    Read the last limit entries of a JSONL history file
+    
+    Only the tail is parsed; blank or truncated lines are skipped.
+    
+    Returns:
+        Tuple of (entries as a deque with maxlen=limit, number of lines in the file)
+    """
+    tail: Deque[bytes] = deque(maxlen=limit)
+    total = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                tail.append(line)
+                total += 1
+    
+    entries: Deque[Dict] = deque(maxlen=limit)
+    for line in tail:
+        try:
+            entries.append(_json_loads(line))
+        except ValueError:
+            logger.warning(f"Skipping corrupted line in {path}")
+    return entries, total
+
+
+def _write_jsonl(path: Path, entries: Sequence[Dict], append: bool):
+    """Append entries as JSON lines, or rewrite the file atomically (temp file + rename)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = b"".join(_dump_line(entry) for entry in entries)
+    if append:
+        with open(path, 'ab') as f:
+            f.write(data)
+        return
+    temp_file = path.with_suffix('.jsonl.tmp')
+    with open(temp_file, 'wb') as f:
+        f.write(data)
+    temp_file.replace(path)
+
+
+# Open reduce-only limit orders are this bot's partial TP orders
+_REDUCE_ONLY_VALUES = frozenset((True, "true", "True"))
+_OPEN_ORDER_STATUSES = frozenset(("New", "PartiallyFilled"))
+
+
+def _open_tp_orders(open_orders: List[Dict]) -> List[Dict]:
+    """Filter open orders down to resting TP orders (reduce-only limit orders)"""
+    return [
+        o for o in open_orders
+        if o.get("reduceOnly") in _REDUCE_ONLY_VALUES and
+           o.get("orderType") == "Limit" and
+           o.get("orderStatus") in _OPEN_ORDER_STATUSES
+    ]
+
+
+@functools.lru_cache(maxsize=256)
+def _step_units(step: float) -> Tuple[int, int]:
+    """
+    Split a qty step / tick size into (step in integer units, decimal places)
+    
+    Decimal is used once per distinct step (cached); rounding itself then
+    runs on ints and floats.
+    """
+    step_decimal = Decimal(str(step))
+    decimals = max(0, -step_decimal.as_tuple().exponent)
+    return int(step_decimal * 10 ** decimals), decimals
+
+
+def _round_down_to_step(value: float, step: float) -> float:
+    """
+    Round value down to a multiple of step, exactly like Decimal(str(value)) // step * step
+    
+    The shortest repr of value is truncated to the step's decimal places as
+    an integer, so float error never drops a whole step.
+    """
+    step_units, decimals = _step_units(step)
+    text = repr(value)
+    if 'e' in text or 'n' in text:  # Exponent form, inf or nan
+        step_decimal = Decimal(str(step))
+        return float((Decimal(text) // step_decimal) * step_decimal)
+    whole, _, frac = text.partition('.')
+    units = int(whole + frac[:decimals].ljust(decimals, '0'))
+    return (units // step_units * step_units) / 10 ** decimals
+
+
+# Price sanity bounds for symbols whose instruments info has not been loaded yet
+_DEFAULT_PRICE_BOUNDS = (0.0, 1000000.0)
+
+
+def _price_bounds_from_info(info: Optional[Dict]) -> Optional[Tuple[float, float]]:
+    """(minPrice, maxPrice) from an instruments info priceFilter, None if missing or invalid"""
+    price_filter = info.get("priceFilter") if isinstance(info, dict) else None
+    if not isinstance(price_filter, dict):
+        return None
+    try:
+        return float(price_filter.get("minPrice", 0)), float(price_filter.get("maxPrice", 1000000))
+    except (ValueError, TypeError):
+        return None
+
+
+# Side conversions (internal LONG/SHORT <-> Bybit Buy/Sell)
+_BYBIT_TO_INTERNAL = {"Buy": "LONG", "Sell": "SHORT"}
+_INTERNAL_TO_BYBIT = {"LONG": "Buy", "SHORT": "Sell"}
+_OPPOSITE_SIDE = {"LONG": "SHORT", "SHORT": "LONG"}
+
 
 class BotController:
     """
@@ -28,9 +163,11 @@ class BotController:
     Bybit API format: "Buy" (for LONG) or "Sell" (for SHORT)
     
     Thread Safety:
-    - Uses asyncio.Lock() for critical sections
+    - Uses asyncio.Lock() for critical sections (multi-field state updates)
+    - Single-attribute state writes need no lock (no locked section awaits)
     - All shared state modifications are protected
-    - Lock acquisition order: _state_lock > _entry_lock > _price_lock > _file_lock > _kline_lock
+    - Lock acquisition order: _state_lock > _entry_lock > _file_lock
+    - realtime_prices is written without a lock (single event loop thread)
     
     State Management:
     - Each symbol has its own SymbolState for tracking positions and indicators
@@ -46,20 +183,18 @@ class BotController:
     @staticmethod
     def _bybit_side_to_internal(bybit_side: str) -> str:
         """Convert Bybit side (Buy/Sell) to internal side (LONG/SHORT)"""
-        if bybit_side == "Buy":
-            return "LONG"
-        elif bybit_side == "Sell":
-            return "SHORT"
-        raise ValueError(f"Invalid Bybit side: {bybit_side}. Must be 'Buy' or 'Sell'")
+        try:
+            return _BYBIT_TO_INTERNAL[bybit_side]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid Bybit side: {bybit_side}. Must be 'Buy' or 'Sell'")
     
     @staticmethod
     def _internal_side_to_bybit(internal_side: str) -> str:
         """Convert internal side (LONG/SHORT) to Bybit side (Buy/Sell)"""
-        if internal_side == "LONG":
-            return "Buy"
-        elif internal_side == "SHORT":
-            return "Sell"
-        raise ValueError(f"Invalid internal side: {internal_side}. Must be 'LONG' or 'SHORT'")
+        try:
+            return _INTERNAL_TO_BYBIT[internal_side]
+        except (KeyError, TypeError):
+            raise ValueError(f"Invalid internal side: {internal_side}. Must be 'LONG' or 'SHORT'")
     
     @staticmethod
     def _get_opposite_side(side: str) -> str:
@@ -73,11 +208,7 @@ class BotController:
         Returns:
             Opposite side
         """
-        if side == "LONG":
-            return "SHORT"
-        elif side == "SHORT":
-            return "LONG"
-        return side  # Fallback
+        return _OPPOSITE_SIDE.get(side, side)  # Unknown sides pass through
     
     def _get_exit_side_bybit(self, position_side: str) -> str:
         """
@@ -111,7 +242,12 @@ class BotController:
         Raises:
             ValueError: If position_side is invalid or prices/qty are invalid
         """
-        if not position_side or position_side not in ["LONG", "SHORT"]:
+        sign = SIDE_SIGNS.get(position_side)
+        # Valid inputs pass one combined guard; the messages are only built on failure
+        if sign is not None and entry_price and exit_price and qty and entry_price > 0 and exit_price > 0 and qty > 0:
+            return (exit_price - entry_price) * qty * sign
+        
+        if sign is None:
             raise ValueError(f"Invalid position_side: {position_side}")
         
         if not entry_price or entry_price <= 0:
@@ -120,25 +256,20 @@ class BotController:
         if not exit_price or exit_price <= 0:
             raise ValueError(f"Invalid exit_price: {exit_price}")
         
-        if not qty or qty <= 0:
-            raise ValueError(f"Invalid qty: {qty}")
-        
-        if position_side == "LONG":
-            return (exit_price - entry_price) * qty
-        else:  # SHORT
-            return (entry_price - exit_price) * qty
+        raise ValueError(f"Invalid qty: {qty}")
     
     async def _clear_tp_order_id(self, state: SymbolState):
         """
-        Clear TP order ID with proper locking
+        Clear TP order ID
         
-        Centralized method to ensure consistent state management.
+        Centralized method to ensure consistent state management. A single
+        attribute write needs no _state_lock: no locked section awaits, so
+        it cannot land in the middle of one.
         
         Args:
             state: SymbolState instance
         """
-        async with self._state_lock:
-            state.tp_limit_order_id = None
+        state.tp_limit_order_id = None
     
     async def _parse_position_from_api(self, position: dict, symbol: str) -> Optional[Dict[str, Any]]:
         """
@@ -210,9 +341,10 @@ class BotController:
         return size_ratio is not None and 0.45 <= size_ratio <= 0.55
     
     def __init__(self):
+        config = get_config()
         self.config = config
         self.client = BybitClient(config.bybit)
-        self.websocket = BybitWebSocket(config.bybit.testnet)
+        self.websocket = create_websocket(config.bybit.testnet, config.bybit.ws_backend)
         self.trend_filter = TrendFilter(config.indicators.ema_period_4h)
         self.contrarian = ContrarianEntry()
         
@@ -225,6 +357,9 @@ class BotController:
         # Real-time price cache from WebSocket
         self.realtime_prices: Dict[str, float] = {}
         
+        # Per-symbol (min_price, max_price) from instruments info, for _validate_price
+        self._price_bounds: Dict[str, Tuple[float, float]] = {}
+        
         # Track if klines are initialized (historical data loaded)
         self.klines_initialized: Dict[str, bool] = {
             symbol: False for symbol in config.trading.symbols
@@ -236,41 +371,54 @@ class BotController:
         self.last_balance_update: Optional[datetime] = None
         self.last_equity_point_time: Optional[datetime] = None
         
-        # Equity history persistence
-        self.equity_history_file = Path("data/equity_history.json")
-        self.equity_history: List[Dict] = []
+        # Equity history persistence (append-only JSONL, legacy JSON is migrated on load)
+        self.equity_history_file = Path("data/equity_history.jsonl")
+        self._legacy_equity_history_file = Path("data/equity_history.json")
+        self.equity_history: Deque[Dict] = deque(maxlen=_HISTORY_MAX)
+        self._equity_unsaved: List[Dict] = []  # Points not yet appended to the file
+        self._equity_file_lines = 0
         self._load_equity_history()
         
         # Trade history persistence
-        self.trade_history_file = Path("data/trade_history.json")
-        self.trade_history: List[Dict] = []
+        self.trade_history_file = Path("data/trade_history.jsonl")
+        self._legacy_trade_history_file = Path("data/trade_history.json")
+        self.trade_history: Deque[Dict] = deque(maxlen=_HISTORY_MAX)
+        self._trade_unsaved: List[Dict] = []
+        self._trade_file_lines = 0
         self._load_trade_history()
         
         self.trading_enabled = config.trading_enabled
         self.running = False
         self.start_time: Optional[datetime] = None
-        self.last_4h_update = {}
+        self.last_4h_update: Dict[str, float] = {}  # symbol -> time.monotonic() of the last 4H refresh
         self.ws_task: Optional[asyncio.Task] = None
         
         # Track async tasks for proper shutdown
-        self._background_tasks: List[asyncio.Task] = []
-        self._background_tasks_lock = asyncio.Lock()
+        self._background_tasks: Set[asyncio.Task] = set()
+        
+        # Coalesced history writes: producers set the event, one flusher task writes
+        self._history_dirty = asyncio.Event()
+        self._history_flusher: Optional[asyncio.Task] = None
         
         # Locks for thread safety
-        # Lock acquisition order: _state_lock > _entry_lock > _price_lock > _file_lock > _kline_lock
+        # Lock acquisition order: _state_lock > _entry_lock > _file_lock
         self._entry_lock = asyncio.Lock()  # Prevents race condition on balance check + entry
+        # Symbols whose entry order is placed but not yet recorded in state (count toward the cap)
+        self._pending_entries: Set[str] = set()
         self._state_lock = asyncio.Lock()  # Protects state modifications (highest priority)
         self._file_lock = asyncio.Lock()   # Protects file I/O operations
-        self._price_lock = asyncio.Lock()  # Protects realtime_prices dict
+        
+        # Caps symbols processed at once by the trading loop (outstanding REST calls)
+        self._symbol_semaphore = asyncio.Semaphore(self.config.max_concurrent_symbols)
         
         # Track processed candles to prevent duplicate entries
+        # No lock: the check-and-set in _handle_kline_update has no await in between
         self._processed_candles: Dict[str, int] = {}  # symbol:interval -> last_timestamp
-        self._processed_candles_lock = asyncio.Lock()
         
         # Circuit breaker for API failures
         self._api_failure_count = 0
         self._api_failure_threshold = 5
-        self._circuit_breaker_until: Optional[datetime] = None
+        self._circuit_breaker_until: Optional[float] = None  # time.monotonic() deadline
     
     async def _create_background_task(self, coro):
         """
@@ -288,35 +436,10 @@ class BotController:
         try:
             task = asyncio.create_task(coro)
             
-            # Add to tracking list with lock protection (thread-safe)
-            async with self._background_tasks_lock:
-                self._background_tasks.append(task)
-            
-            # Set up removal callback
-            def remove_task(t):
-                try:
-                    # Schedule async removal in event loop
-                    async def remove_async():
-                        async with self._background_tasks_lock:
-                            if t in self._background_tasks:
-                                self._background_tasks.remove(t)
-                    # Create task for async removal (callback is sync, but we're in event loop)
-                    try:
-                        # Use get_running_loop() for Python 3.7+ (more reliable)
-                        loop = asyncio.get_running_loop()
-                        loop.create_task(remove_async())
-                    except RuntimeError:
-                        # Fallback to get_event_loop() if get_running_loop() fails
-                        try:
-                            loop = asyncio.get_event_loop()
-                            if loop.is_running():
-                                loop.create_task(remove_async())
-                        except RuntimeError:
-                            pass  # Event loop not available
-                except (ValueError, RuntimeError):
-                    pass  # Task already removed or list modified
-            
-            task.add_done_callback(remove_task)
+            # Strong reference until done (the event loop only keeps weak ones);
+            # callbacks run on the loop thread, so no lock is needed
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
             return task
             
         except RuntimeError as e:
@@ -346,9 +469,10 @@ class BotController:
     
     def _validate_price(self, price: float, symbol: str = "") -> bool:
         """
-        Validate that price is positive and reasonable
+        Validate that price is positive and within the instrument's price range
         
-        Centralized validation to avoid code duplication.
+        Bounds come from instruments info (minPrice/maxPrice), cached per
+        symbol; symbols without loaded info fall back to (0, 1M].
         
         Args:
             price: Price to validate
@@ -357,23 +481,18 @@ class BotController:
         Returns:
             True if price is valid, False otherwise
         """
-        if price is None:
-            if symbol:
-                logger.warning(f"[{symbol}] Price is None")
-            return False
+        min_price, max_price = self._price_bounds.get(symbol, _DEFAULT_PRICE_BOUNDS)
+        if price is not None and 0 < price and min_price <= price <= max_price:
+            return True
         
-        if price <= 0:
-            if symbol:
+        if symbol:
+            if price is None:
+                logger.warning(f"[{symbol}] Price is None")
+            elif price <= 0:
                 logger.warning(f"[{symbol}] Invalid price: {price} (must be positive)")
-            return False
-        
-        # Sanity check: price should be reasonable (not too large)
-        if price > 1000000:  # 1M USDT per unit is unreasonable for most assets
-            if symbol:
-                logger.warning(f"[{symbol}] Price seems unreasonably high: {price}")
-            return False
-        
-        return True
+            else:
+                logger.warning(f"[{symbol}] Price {price} outside instrument range [{min_price}, {max_price}]")
+        return False
     
     def _validate_position_size(self, position_size: Optional[float], symbol: str = "") -> bool:
         """
@@ -453,27 +572,21 @@ class BotController:
                 return None
             
             exit_side_bybit = self._get_exit_side_bybit(position_side)
-            current_time = datetime.now().timestamp()
+            # Compare raw execTime values (ms) against one precomputed cutoff
+            cutoff_ms = int(time.time() * 1000) - time_window_seconds * 1000
             
             for exec_item in executions:
-                exec_side = exec_item.get("side", "")
-                exec_time_str = exec_item.get("execTime", "0")
-                
+                if exec_item.get("side") != exit_side_bybit:
+                    continue
                 try:
-                    exec_time = int(exec_time_str) / 1000  # Convert to seconds
-                    time_diff = current_time - exec_time
-                    
-                    if time_diff < time_window_seconds and exec_side == exit_side_bybit:
-                        exec_price_str = exec_item.get("execPrice", "0")
-                        try:
-                            exec_price = float(exec_price_str)
-                            if exec_price > 0:
-                                logger.info(f"[{symbol}] Found execution price from recent executions: {exec_price}")
-                                return exec_price
-                        except (ValueError, TypeError):
-                            continue
+                    if int(exec_item.get("execTime", 0)) <= cutoff_ms:
+                        continue
+                    exec_price = float(exec_item.get("execPrice", 0))
                 except (ValueError, TypeError):
                     continue
+                if exec_price > 0:
+                    logger.info(f"[{symbol}] Found execution price from recent executions: {exec_price}")
+                    return exec_price
         except Exception as e:
             logger.debug(f"[{symbol}] Error getting execution price from recent executions: {e}")
         
@@ -489,7 +602,8 @@ class BotController:
         Returns:
             float: Required margin in USDT
         """
-        base_margin = self.config.trading.position_size_usdt / self.config.trading.leverage
+        trading = self.config.trading
+        base_margin = trading.position_size_usdt / trading.leverage
         return base_margin * buffer_multiplier
     
     def _calculate_tp_target_profit(self, partial_percentage: float = 0.5) -> float:
@@ -519,11 +633,15 @@ class BotController:
             - fees = 50 * 0.002 = 0.1 USDT (fees on 50% of position)
             - target = 5 + 0.1 = 5.1 USDT
         """
+        # Read live config once (position size / leverage can change via the web API)
+        trading = self.config.trading
+        position_size_usdt = trading.position_size_usdt
+        
         # Calculate TOTAL margin used to enter the position (entire sum you entered with)
-        margin_total = self.config.trading.position_size_usdt / self.config.trading.leverage
+        margin_total = position_size_usdt / trading.leverage
         
         # Fees are calculated on the partial position value being closed
-        partial_position_size = self.config.trading.position_size_usdt * partial_percentage
+        partial_position_size = position_size_usdt * partial_percentage
         fees = partial_position_size * 0.002  # 0.2% total (entry + exit)
         
         # Target profit = entire margin you entered with + fees
@@ -549,18 +667,14 @@ class BotController:
         Returns:
             Target price for TP order, or None if invalid
         """
-        if not position_side or not entry_price or not target_profit or not qty_partial:
+        sign = SIDE_SIGNS.get(position_side)
+        if sign is None or not entry_price or not target_profit or not qty_partial:
             return None
         
         if entry_price <= 0 or target_profit <= 0 or qty_partial <= 0:
             return None
         
-        if position_side == "LONG":
-            target_price = entry_price + (target_profit / qty_partial)
-        elif position_side == "SHORT":
-            target_price = entry_price - (target_profit / qty_partial)
-        else:
-            return None
+        target_price = entry_price + sign * (target_profit / qty_partial)
         
         if target_price <= 0:
             return None
@@ -568,12 +682,12 @@ class BotController:
         # Overflow protection - ensure target_price is within reasonable range
         # Target price should not exceed ±50% of entry price (sanity check)
         max_price_change_pct = 0.5  # 50%
-        if position_side == "LONG":
+        if sign > 0:
             max_target_price = entry_price * (1 + max_price_change_pct)
             if target_price > max_target_price:
                 logger.warning(f"Target price {target_price:.2f} exceeds maximum {max_target_price:.2f} (50% above entry)")
                 return None
-        elif position_side == "SHORT":
+        else:
             min_target_price = entry_price * (1 - max_price_change_pct)
             if target_price < min_target_price:
                 logger.warning(f"Target price {target_price:.2f} below minimum {min_target_price:.2f} (50% below entry)")
@@ -593,7 +707,7 @@ class BotController:
         """Check if circuit breaker is active"""
         if self._circuit_breaker_until is None:
             return False
-        if datetime.now() >= self._circuit_breaker_until:
+        if time.monotonic() >= self._circuit_breaker_until:
             self._circuit_breaker_until = None
             self._api_failure_count = 0
             logger.info("Circuit breaker reset - resuming trading")
@@ -604,7 +718,7 @@ class BotController:
         """Record API failure and potentially activate circuit breaker"""
         self._api_failure_count += 1
         if self._api_failure_count >= self._api_failure_threshold:
-            self._circuit_breaker_until = datetime.now() + timedelta(minutes=5)
+            self._circuit_breaker_until = time.monotonic() + 300
             logger.warning(f"Circuit breaker activated - pausing trading for 5 minutes after {self._api_failure_count} failures")
     
     def _record_api_success(self):
@@ -617,13 +731,6 @@ class BotController:
         logger.info("🚀 CONTRARIAN PULLBACK BOT STARTING")
         logger.info("=" * 60)
         
-        # Validate configuration
-        try:
-            self.config.validate()
-        except ValueError as e:
-            logger.error(f"❌ Configuration error: {e}")
-            raise
-        
         logger.info(f"Strategy: Buy dips in uptrend, sell rips in downtrend")
         logger.info(f"Symbols: {', '.join(self.config.trading.symbols)}")
         logger.info(f"Position Size: {self.config.trading.position_size_usdt} USDT")
@@ -651,6 +758,12 @@ class BotController:
         # Initialize klines with historical data
         await self._initialize_klines()
         
+        # Compile (or load cached) numba kernels off the event loop, then bootstrap
+        # indicator states so the first signal only runs incremental updates
+        if _kernels.NUMBA_AVAILABLE:
+            await asyncio.to_thread(_kernels._warm_up)
+        self._warm_indicator_states()
+        
         # Start WebSocket for real-time prices and klines
         await self._start_websocket()
         
@@ -666,8 +779,7 @@ class BotController:
         await asyncio.sleep(2)
         
         # Await all background tasks before shutdown
-        async with self._background_tasks_lock:
-            tasks_to_wait = list(self._background_tasks)
+        tasks_to_wait = list(self._background_tasks)
         
         if tasks_to_wait:
             logger.info(f"Waiting for {len(tasks_to_wait)} background tasks to complete...")
@@ -700,94 +812,98 @@ class BotController:
         
         # Save final state
         async with self._file_lock:
-            self._save_equity_history()
-            self._save_trade_history()
+            await self._save_equity_history()
+            await self._save_trade_history()
         
         logger.info("✓ Bot stopped gracefully")
     
     async def _setup_leverage(self):
-        """Set leverage and margin mode for all symbols"""
+        """Set leverage and margin mode for all symbols (concurrently)"""
         logger.info("Setting up leverage and margin mode...")
         
-        for symbol in self.config.trading.symbols:
-            try:
-                await self.client.set_leverage(
-                    symbol=symbol,
-                    leverage=self.config.trading.leverage
-                )
-                await self.client.set_margin_mode(
-                    symbol=symbol,
-                    margin_mode=self.config.trading.margin_mode
-                )
-                logger.info(f"✓ {symbol}: {self.config.trading.leverage}x {self.config.trading.margin_mode}")
-                self._record_api_success()
-            except Exception as e:
-                logger.warning(f"Setup {symbol}: {e}")
-                self._record_api_failure()
+        await asyncio.gather(*(self._setup_symbol(symbol) for symbol in self.config.trading.symbols))
+    
+    async def _setup_symbol(self, symbol: str):
+        """Set leverage and margin mode for one symbol"""
+        try:
+            await self.client.set_leverage(
+                symbol=symbol,
+                leverage=self.config.trading.leverage
+            )
+            await self.client.set_margin_mode(
+                symbol=symbol,
+                margin_mode=self.config.trading.margin_mode
+            )
+            logger.info(f"✓ {symbol}: {self.config.trading.leverage}x {self.config.trading.margin_mode}")
+            
+            # Cache price bounds (the client also caches the info for TP placement)
+            bounds = _price_bounds_from_info(await self.client.get_instruments_info(symbol))
+            if bounds:
+                self._price_bounds[symbol] = bounds
+            self._record_api_success()
+        except Exception as e:
+            logger.warning(f"Setup {symbol}: {e}")
+            self._record_api_failure()
     
     async def _sync_positions(self):
-        """Sync existing positions from Bybit"""
+        """Sync existing positions from Bybit (concurrently per symbol)"""
         logger.info("Syncing existing positions...")
         
-        for symbol in self.config.trading.symbols:
-            try:
-                position = await self.client.get_position(symbol)
+        await asyncio.gather(*(self._sync_position(symbol) for symbol in self.config.trading.symbols))
+    
+    async def _sync_position(self, symbol: str):
+        """Sync one symbol's position (and its TP order) from Bybit"""
+        try:
+            position = await self.client.get_position(symbol)
+            
+            if position:
+                # Parse position data using centralized helper
+                position_data = await self._parse_position_from_api(position, symbol)
+                if not position_data:
+                    # Invalid position data - record failure and skip this symbol
+                    self._record_api_failure()
+                    return
                 
-                if position:
-                    # Parse position data using centralized helper
-                    position_data = await self._parse_position_from_api(position, symbol)
-                    if not position_data:
-                        # Invalid position data - record failure and continue to next symbol
-                        self._record_api_failure()
-                        continue
+                size = position_data['size']
+                side = position_data['side']
+                entry_price = position_data['entry_price']
+                
+                if size > 0:
+                    # Update state with normalized side (LONG/SHORT)
+                    async with self._state_lock:
+                        state = self.states[symbol]
+                        state.open_position(side, size, entry_price)
                     
-                    size = position_data['size']
-                    side = position_data['side']
-                    entry_price = position_data['entry_price']
+                    logger.info(f"✓ {symbol}: Found existing {side} position @ {entry_price}")
                     
-                    if size > 0:
-                        # Update state with normalized side (LONG/SHORT)
-                        async with self._state_lock:
-                            state = self.states[symbol]
-                            state.open_position(side, size, entry_price)
-                        
-                        logger.info(f"✓ {symbol}: Found existing {side} position @ {entry_price}")
+                    # Detect if partial TP was already taken before restart
+                    if entry_price > 0:
+                        size_usdt = size * entry_price
+                        expected_size_usdt = self.config.trading.position_size_usdt
                         
-                        # Detect if partial TP was already taken before restart
-                        if entry_price > 0:
-                            size_usdt = size * entry_price
-                            expected_size_usdt = self.config.trading.position_size_usdt
-                            
-                            if self._detect_partial_tp(size_usdt, expected_size_usdt):
-                                async with self._state_lock:
-                                    state.partial_tp_done = True
-                                size_ratio = self._calculate_size_ratio(size_usdt, expected_size_usdt)
-                                logger.info(f"[{symbol}] Detected partial TP already taken (size ratio: {size_ratio:.2%})")
-                                self._record_api_success()
-                                continue
-                        
-                        # Check for existing TP order
-                        open_orders = await self.client.get_open_orders(symbol)
-                        tp_orders = [
-                            o for o in open_orders 
-                            if o.get("reduceOnly") in [True, "true", "True"] and 
-                               o.get("orderType") == "Limit" and
-                               o.get("orderStatus") in ["New", "PartiallyFilled"]
-                        ]
-                        if tp_orders:
-                            async with self._state_lock:
-                                state.tp_limit_order_id = tp_orders[0].get("orderId")
-                            logger.info(f"[{symbol}] Found existing TP limit order: {state.tp_limit_order_id}")
-                        else:
-                            # Place TP order for existing position
-                            await asyncio.sleep(0.5)
-                            await self._place_partial_tp_limit_order(symbol, state)
-                
-                self._record_api_success()
+                        if self._detect_partial_tp(size_usdt, expected_size_usdt):
+                            state.partial_tp_done = True
+                            size_ratio = self._calculate_size_ratio(size_usdt, expected_size_usdt)
+                            logger.info(f"[{symbol}] Detected partial TP already taken (size ratio: {size_ratio:.2%})")
+                            self._record_api_success()
+                            return
+                    
+                    # Check for existing TP order
+                    open_orders = await self.client.get_open_orders(symbol)
+                    tp_orders = _open_tp_orders(open_orders)
+                    if tp_orders:
+                        state.tp_limit_order_id = tp_orders[0].get("orderId")
+                        logger.info(f"[{symbol}] Found existing TP limit order: {state.tp_limit_order_id}")
+                    else:
+                        # Place TP order for existing position
+                        await asyncio.sleep(0.5)
+                        await self._place_partial_tp_limit_order(symbol, state)
             
-            except Exception as e:
-                logger.error(f"Error syncing position for {symbol}: {e}")
-                self._record_api_failure()
+            self._record_api_success()
+        
+        except Exception as e:
+            logger.error(f"Error syncing position for {symbol}: {e}")
+            self._record_api_failure()
     
     async def _start_websocket(self):
         """Start WebSocket connection for real-time price and kline updates"""
@@ -799,17 +915,15 @@ class BotController:
             logger.warning("Failed to connect WebSocket, will use REST API only")
             return
         
-        # Subscribe to tickers for all symbols
-        for symbol in self.config.trading.symbols:
-            await self.websocket.subscribe_ticker(symbol, self._handle_price_update)
-        
-        # Subscribe to klines for all symbols (1H and 4H)
+        # Subscribe to tickers and klines (1H and 4H) for all symbols in batched requests
         async def kline_callback(symbol, interval, candle, is_confirmed):
             await self._handle_kline_update(symbol, interval, is_confirmed, candle)
         
-        for symbol in self.config.trading.symbols:
-            await self.websocket.subscribe_kline(symbol, "60", kline_callback)
-            await self.websocket.subscribe_kline(symbol, "240", kline_callback)
+        symbols = self.config.trading.symbols
+        await self.websocket.subscribe_many(
+            tickers={symbol: self._handle_price_update for symbol in symbols},
+            klines={(symbol, interval): kline_callback for symbol in symbols for interval in ("60", "240")}
+        )
         
         # Start listening task
         self.ws_task = asyncio.create_task(self.websocket.listen())
@@ -818,51 +932,77 @@ class BotController:
         logger.info(f"✓ Subscribed to tickers and klines (1H, 4H)")
     
     async def _initialize_klines(self):
-        """Initialize kline data with historical candles from REST API (one-time)"""
+        """Initialize kline data with historical candles from REST API (one-time, concurrently)"""
         logger.info("Initializing kline data from REST API...")
         
-        for symbol in self.config.trading.symbols:
-            try:
-                # Fetch historical 1H candles
-                candles_1h = await self.client.get_klines(
+        await asyncio.gather(*(self._initialize_symbol_klines(symbol) for symbol in self.config.trading.symbols))
+        
+        logger.info("✓ Kline initialization complete")
+    
+    async def _initialize_symbol_klines(self, symbol: str):
+        """Fetch the 1H and 4H history for one symbol (both requests in flight together)"""
+        try:
+            # Parsed once into chronological float64 arrays, bulk-copied into the kline cache
+            candles_1h, candles_4h = await asyncio.gather(
+                self.client.get_klines_array(
                     symbol=symbol,
                     interval="60",
                     limit=100
-                )
-                
-                if candles_1h:
-                    candles_1h_chronological = candles_1h[::-1]
-                    key_1h = f"{symbol}:60"
-                    async with self.websocket._kline_lock:
-                        if key_1h not in self.websocket.kline_data:
-                            self.websocket.kline_data[key_1h] = deque(maxlen=500)
-                        self.websocket.kline_data[key_1h].extend(candles_1h_chronological)
-                    logger.debug(f"✓ {symbol} 1H: Loaded {len(candles_1h)} historical candles")
-                
-                # Fetch historical 4H candles
-                candles_4h = await self.client.get_klines(
+                ),
+                self.client.get_klines_array(
                     symbol=symbol,
                     interval="240",
                     limit=self.config.indicators.ema_period_4h + 50
                 )
+            )
+            
+            if len(candles_1h):
+                self.websocket.seed_klines(symbol, "60", candles_1h)
+                logger.debug(f"✓ {symbol} 1H: Loaded {len(candles_1h)} historical candles")
+            
+            if len(candles_4h):
+                self.websocket.seed_klines(symbol, "240", candles_4h)
+                logger.debug(f"✓ {symbol} 4H: Loaded {len(candles_4h)} historical candles")
+            
+            self.klines_initialized[symbol] = True
+            self._record_api_success()
+            
+        except Exception as e:
+            logger.error(f"Error initializing klines for {symbol}: {e}")
+            self._record_api_failure()
+    
+    def _warm_indicator_states(self):
+        """
+        Bootstrap per-symbol EMA/SuperTrend states from the seeded klines
+        
+        The numba kernels are compiled just before this in start();
+        what remains for the first tick is the full-window cold start of each
+        stateful indicator, which is done here before the trading loop starts.
+        """
+        indicators = self.config.indicators
+        for symbol, initialized in self.klines_initialized.items():
+            state = self.states.get(symbol)
+            if not initialized or state is None:
+                continue
+            try:
+                candles_4h = self.websocket.klines_array(symbol, "240", limit=indicators.ema_period_4h + 50)
+                if len(candles_4h) >= max(indicators.ema_period_4h, indicators.st_period_4h + 1):
+                    calculate_ema_stateful(state.ema_states, "240", candles_4h, indicators.ema_period_4h)
+                    calculate_supertrend_incremental(
+                        state.supertrend_states, "240", candles_4h,
+                        indicators.st_period_4h, indicators.st_multiplier_4h
+                    )
                 
-                if candles_4h:
-                    candles_4h_chronological = candles_4h[::-1]
-                    key_4h = f"{symbol}:240"
-                    async with self.websocket._kline_lock:
-                        if key_4h not in self.websocket.kline_data:
-                            self.websocket.kline_data[key_4h] = deque(maxlen=500)
-                        self.websocket.kline_data[key_4h].extend(candles_4h_chronological)
-                    logger.debug(f"✓ {symbol} 4H: Loaded {len(candles_4h)} historical candles")
-                
-                self.klines_initialized[symbol] = True
-                self._record_api_success()
-                
-            except Exception as e:
-                logger.error(f"Error initializing klines for {symbol}: {e}")
-                self._record_api_failure()
+                candles_1h = self.websocket.klines_array(symbol, "60", limit=100)
+                if len(candles_1h) >= indicators.st_period_1h + 1:
+                    calculate_supertrend_incremental(
+                        state.supertrend_states, "60", candles_1h,
+                        indicators.st_period_1h, indicators.st_multiplier_1h
+                    )
+            except ValueError as e:
+                logger.debug(f"{symbol}: Indicator warm-up skipped: {e}")
         
-        logger.info("✓ Kline initialization complete")
+        logger.info("✓ Indicator states warmed up")
     
     async def _handle_kline_update(self, symbol: str, interval: str, is_confirmed: bool = False, candle: list = None):
         """
@@ -901,18 +1041,16 @@ class BotController:
                     logger.warning(f"[{symbol}] Error parsing candle timestamp: {e}")
                     return
                 
-                async with self._processed_candles_lock:
-                    if candle_key in self._processed_candles:
-                        if self._processed_candles[candle_key] >= candle_timestamp:
-                            logger.debug(f"[{symbol}] Skipping already processed {interval} candle: {candle_timestamp}")
-                            return
-                    
-                    self._processed_candles[candle_key] = candle_timestamp
+                if self._processed_candles.get(candle_key, 0) >= candle_timestamp:
+                    logger.debug(f"[{symbol}] Skipping already processed {interval} candle: {candle_timestamp}")
+                    return
+                
+                self._processed_candles[candle_key] = candle_timestamp
             
             # New 4H candle closed - update 4H trend
             if interval == "240" and is_confirmed:
-                await self._update_4h_trend(symbol, state)
-                self.last_4h_update[symbol] = datetime.now()
+                await self._update_4h_trend(symbol, state, datetime.now())
+                self.last_4h_update[symbol] = time.monotonic()
                 logger.info(f"[{symbol}] 📊 4H candle closed - trend updated")
                 
                 # Check for partial TP and exit immediately after 4H trend update
@@ -929,7 +1067,7 @@ class BotController:
                     logger.info(f"[{symbol}] ✅ 1H candle CONFIRMED (closed) - timestamp: {candle[0] if candle else 'N/A'}, time: {candle_time}")
                 
                 if is_confirmed:
-                    has_ws_data = await self.websocket.has_klines(symbol, "60")
+                    has_ws_data = self.websocket.has_klines(symbol, "60")
                     if has_ws_data:
                         await self._update_1h_signal(symbol, state)
                     else:
@@ -963,19 +1101,17 @@ class BotController:
     
     async def _handle_price_update(self, symbol: str, price: float):
         """Handle real-time price update from WebSocket"""
-        # Update price cache with lock
-        async with self._price_lock:
-            self.realtime_prices[symbol] = price
+        # Plain dict write: no await in between, so no other task can interleave
+        self.realtime_prices[symbol] = price
         
         state = self.states.get(symbol)
         if not state:
             return
         
         # If in position, check for exit on significant price move
+        # Distance precomputed on open: one subtract and compare per tick
         if state.position_side and state.entry_price:
-            price_change_pct = abs(price - state.entry_price) / state.entry_price * 100
-            
-            if price_change_pct > 0.5:  # Increased threshold to reduce API calls
+            if abs(price - state.entry_price) > state.exit_check_distance:
                 await self._check_exit(symbol, state)
     
     def _get_current_price(self, symbol: str) -> Optional[float]:
@@ -983,7 +1119,7 @@ class BotController:
         Get current price from WebSocket cache
         
         Note: This is a synchronous method for quick reads.
-        For thread-safe access, use _get_current_price_with_fallback which uses locks.
+        Use _get_current_price_with_fallback to fall back to the REST API.
         """
         return self.realtime_prices.get(symbol)
     
@@ -1003,8 +1139,7 @@ class BotController:
                     try:
                         price = float(ticker['lastPrice'])
                         if price > 0:
-                            async with self._price_lock:
-                                self.realtime_prices[symbol] = price
+                            self.realtime_prices[symbol] = price
                             self._record_api_success()
                             return price
                         else:
@@ -1025,11 +1160,10 @@ class BotController:
                     self._record_api_failure()
         
         # Final fallback - use last known price if available
-        async with self._price_lock:
-            cached_price = self.realtime_prices.get(symbol)
-            if cached_price and cached_price > 0:
-                logger.debug(f"[{symbol}] Using cached price as fallback: {cached_price}")
-                return cached_price
+        cached_price = self.realtime_prices.get(symbol)
+        if cached_price and cached_price > 0:
+            logger.debug(f"[{symbol}] Using cached price as fallback: {cached_price}")
+            return cached_price
         
         return None
     
@@ -1047,17 +1181,20 @@ class BotController:
                     await asyncio.sleep(self.config.check_interval_seconds)
                     continue
                 
+                # One wall-clock read per iteration, shared by the helpers below
+                now = datetime.now()
+                
                 # Update balance every 10 iterations
                 balance_update_counter += 1
                 if balance_update_counter >= 10:
-                    await self._update_account_balance()
+                    await self._update_account_balance(now)
                     balance_update_counter = 0
                 
-                # Process symbols sequentially to avoid race conditions
-                for symbol in self.config.trading.symbols:
-                    if not self.running:
-                        break
-                    await self._process_symbol(symbol)
+                # Symbols are independent; entries serialize on _entry_lock, which also
+                # enforces the open-position cap (see _enter_position)
+                await asyncio.gather(*(
+                    self._process_symbol_bounded(symbol, now) for symbol in self.config.trading.symbols
+                ))
                 
                 await asyncio.sleep(self.config.check_interval_seconds)
             
@@ -1068,27 +1205,34 @@ class BotController:
                 logger.error(f"Error in trading loop: {e}", exc_info=True)
                 await asyncio.sleep(60)
     
-    async def _process_symbol(self, symbol: str):
-        """Process one symbol"""
+    async def _process_symbol_bounded(self, symbol: str, now: datetime):
+        """Run _process_symbol under the concurrency cap (skipped once the bot stops)"""
+        async with self._symbol_semaphore:
+            if self.running:
+                await self._process_symbol(symbol, now)
+    
+    async def _process_symbol(self, symbol: str, now: Optional[datetime] = None):
+        """Process one symbol (now: the trading loop iteration's timestamp)"""
         try:
             state = self.states[symbol]
             
-            # 0. Sync position from Bybit (verify state matches reality)
-            await self._verify_position(symbol, state)
-            
-            # 1. Update 4H trend periodically
+            # 1. Update 4H trend periodically (monotonic clock: immune to wall-clock jumps)
+            now = now or datetime.now()
+            mono = time.monotonic()
+            last_update = self.last_4h_update.get(symbol)
             should_update_4h = (
-                symbol not in self.last_4h_update or
-                datetime.now() - self.last_4h_update.get(symbol, datetime.min) > 
-                timedelta(hours=self.config.update_4h_interval_hours)
+                last_update is None or
+                mono - last_update > self.config.update_4h_interval_hours * 3600
             )
             
+            # 0-2. Position sync from Bybit (verify state matches reality), 4H trend and
+            # 1H signal (for display and entry check) are independent reads: run them together
+            updates = [self._verify_position(symbol, state), self._update_1h_signal(symbol, state)]
             if should_update_4h:
-                await self._update_4h_trend(symbol, state)
-                self.last_4h_update[symbol] = datetime.now()
-            
-            # 2. Update 1H signal (for display and entry check)
-            await self._update_1h_signal(symbol, state)
+                updates.append(self._update_4h_trend(symbol, state, now))
+            await asyncio.gather(*updates)
+            if should_update_4h:
+                self.last_4h_update[symbol] = mono
             
             # 2.5. Check for entry if contrarian conditions are met (periodic check)
             # This ensures we don't miss entry signals even if WebSocket didn't receive the confirmed candle update
@@ -1153,19 +1297,20 @@ class BotController:
         
         return self.account_balance
     
-    async def _update_account_balance(self):
+    async def _update_account_balance(self, now: Optional[datetime] = None):
         """Update account balance and total equity from Bybit"""
+        now = now or datetime.now()
         try:
             balance = await self.client.get_wallet_balance()
             if balance is not None:
                 self.account_balance = balance
-                self.last_balance_update = datetime.now()
+                self.last_balance_update = now
                 self._record_api_success()
             
             total_equity = await self.client.get_total_equity()
             if total_equity is not None:
                 self.total_equity = total_equity
-                await self._add_equity_point(total_equity, force_add=False)
+                await self._add_equity_point(total_equity, force_add=False, now=now)
                 self._record_api_success()
         except Exception as e:
             logger.debug(f"Error updating account balance: {e}")
@@ -1175,47 +1320,74 @@ class BotController:
         """Load equity history from file"""
         try:
             if self.equity_history_file.exists():
-                with open(self.equity_history_file, 'r') as f:
-                    data = json.load(f)
-                    self.equity_history = data.get('history', [])
-                    logger.info(f"✓ Loaded {len(self.equity_history)} equity data points from history")
-        except json.JSONDecodeError as e:
+                self.equity_history, self._equity_file_lines = _read_jsonl_tail(
+                    self.equity_history_file, _HISTORY_MAX
+                )
+                logger.info(f"✓ Loaded {len(self.equity_history)} equity data points from history")
+            elif self._legacy_equity_history_file.exists():
+                with open(self._legacy_equity_history_file, 'rb') as f:
+                    data = _json_loads(f.read())
+                self.equity_history = deque(data.get('history', []), maxlen=_HISTORY_MAX)
+                # Written to the JSONL file on the next save
+                self._equity_unsaved = list(self.equity_history)
+                logger.info(f"✓ Loaded {len(self.equity_history)} equity data points from legacy history")
+        except ValueError as e:
             logger.error(f"Corrupted equity history file: {e}")
-            backup_path = self.equity_history_file.with_suffix('.json.bak')
+            backup_path = self._legacy_equity_history_file.with_suffix('.json.bak')
             try:
-                self.equity_history_file.rename(backup_path)
+                self._legacy_equity_history_file.rename(backup_path)
                 logger.info(f"Backed up corrupted file to {backup_path}")
             except Exception:
                 pass
-            self.equity_history = []
+            self.equity_history = deque(maxlen=_HISTORY_MAX)
+            self._equity_unsaved = []
         except Exception as e:
             logger.error(f"Error loading equity history: {e}")
-            self.equity_history = []
+            self.equity_history = deque(maxlen=_HISTORY_MAX)
     
-    def _save_equity_history(self):
-        """Save equity history to file (call with _file_lock held)"""
+    async def _save_history(self, path: Path, history: Deque[Dict], unsaved: List[Dict],
+                            file_lines: int, label: str) -> int:
+        """
+        Append unsaved entries to a history file, or compact it (call with _file_lock held)
+        
+        The entries are snapshotted on the event loop and written in a worker
+        thread, so disk I/O never blocks the loop. Entries added during the
+        write stay in unsaved for the next flush; on error all of them do.
+        
+        Returns:
+            Number of lines in the file after the write
+        """
+        pending = len(unsaved)
+        if file_lines + pending > _HISTORY_COMPACT_LINES:
+            # Compact: rewrite with the in-memory window (holds every unsaved entry)
+            entries, append = list(history), False
+        elif pending:
+            entries, append = unsaved[:pending], True
+        else:
+            return file_lines
+        
         try:
-            self.equity_history_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            data = {
-                'last_update': datetime.now().isoformat(),
-                'history': self.equity_history
-            }
-            
-            # Write to temp file first, then rename (atomic operation)
-            temp_file = self.equity_history_file.with_suffix('.json.tmp')
-            with open(temp_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            temp_file.replace(self.equity_history_file)
+            await asyncio.to_thread(_write_jsonl, path, entries, append)
         except Exception as e:
-            logger.error(f"Error saving equity history: {e}")
+            logger.error(f"Error saving {label} history: {e}")
+            return file_lines
+        
+        del unsaved[:pending]
+        return file_lines + pending if append else len(entries)
     
-    async def _add_equity_point(self, equity: float, force_add: bool = False):
+    async def _save_equity_history(self):
+        """Append unsaved equity points to file (call with _file_lock held)"""
+        self._equity_file_lines = await self._save_history(
+            self.equity_history_file, self.equity_history, self._equity_unsaved,
+            self._equity_file_lines, "equity"
+        )
+    
+    async def _add_equity_point(self, equity: float, force_add: bool = False, now: Optional[datetime] = None):
         """Add new equity point to history"""
         if equity <= 0:
             return
         
-        timestamp = datetime.now()
+        timestamp = now or datetime.now()
         point = {
             'timestamp': timestamp.isoformat(),
             'time': timestamp.strftime('%H:%M:%S'),
@@ -1224,10 +1396,9 @@ class BotController:
         
         if force_add:
             self.equity_history.append(point)
+            self._equity_unsaved.append(point)
             self.last_equity_point_time = timestamp
-            if len(self.equity_history) > 1000:
-                self.equity_history = self.equity_history[-1000:]
-            await self._create_background_task(self._save_equity_history_async())
+            await self._mark_history_dirty()
             return
         
         should_add = False
@@ -1246,60 +1417,62 @@ class BotController:
         
         if should_add:
             self.equity_history.append(point)
+            self._equity_unsaved.append(point)
             self.last_equity_point_time = timestamp
             
-            if len(self.equity_history) > 1000:
-                self.equity_history = self.equity_history[-1000:]
-            
             if len(self.equity_history) % 10 == 0:
-                await self._create_background_task(self._save_equity_history_async())
-    
-    async def _save_equity_history_async(self):
-        """Save equity history asynchronously with lock"""
-        async with self._file_lock:
-            self._save_equity_history()
+                await self._mark_history_dirty()
+    
+    async def _mark_history_dirty(self):
+        """Schedule a coalesced write of pending equity points and trades"""
+        self._history_dirty.set()
+        if self._history_flusher is None or self._history_flusher.done():
+            # Tracked like other background tasks so stop() cancels it before the final save
+            self._history_flusher = await self._create_background_task(self._flush_history_loop())
+    
+    async def _flush_history_loop(self):
+        """Write pending history entries, at most once per _HISTORY_FLUSH_DELAY"""
+        while True:
+            await self._history_dirty.wait()
+            await asyncio.sleep(_HISTORY_FLUSH_DELAY)
+            self._history_dirty.clear()
+            async with self._file_lock:
+                await self._save_equity_history()
+                await self._save_trade_history()
     
     def _load_trade_history(self):
         """Load trade history from file"""
         try:
             if self.trade_history_file.exists():
-                with open(self.trade_history_file, 'r') as f:
-                    data = json.load(f)
-                    self.trade_history = data.get('trades', [])
-                    logger.info(f"✓ Loaded {len(self.trade_history)} trades from history")
-        except json.JSONDecodeError as e:
+                self.trade_history, self._trade_file_lines = _read_jsonl_tail(
+                    self.trade_history_file, _HISTORY_MAX
+                )
+                logger.info(f"✓ Loaded {len(self.trade_history)} trades from history")
+            elif self._legacy_trade_history_file.exists():
+                with open(self._legacy_trade_history_file, 'rb') as f:
+                    data = _json_loads(f.read())
+                self.trade_history = deque(data.get('trades', []), maxlen=_HISTORY_MAX)
+                self._trade_unsaved = list(self.trade_history)
+                logger.info(f"✓ Loaded {len(self.trade_history)} trades from legacy history")
+        except ValueError as e:
             logger.error(f"Corrupted trade history file: {e}")
-            backup_path = self.trade_history_file.with_suffix('.json.bak')
+            backup_path = self._legacy_trade_history_file.with_suffix('.json.bak')
             try:
-                self.trade_history_file.rename(backup_path)
+                self._legacy_trade_history_file.rename(backup_path)
             except Exception:
                 pass
-            self.trade_history = []
+            self.trade_history = deque(maxlen=_HISTORY_MAX)
+            self._trade_unsaved = []
         except Exception as e:
             logger.error(f"Error loading trade history: {e}")
-            self.trade_history = []
-    
-    def _save_trade_history(self):
-        """Save trade history to file (call with _file_lock held)"""
-        try:
-            self.trade_history_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            data = {
-                'last_update': datetime.now().isoformat(),
-                'trades': self.trade_history
-            }
-            
-            temp_file = self.trade_history_file.with_suffix('.json.tmp')
-            with open(temp_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            temp_file.replace(self.trade_history_file)
-        except Exception as e:
-            logger.error(f"Error saving trade history: {e}")
+            self.trade_history = deque(maxlen=_HISTORY_MAX)
     
-    async def _save_trade_history_async(self):
-        """Save trade history asynchronously with lock"""
-        async with self._file_lock:
-            self._save_trade_history()
+    async def _save_trade_history(self):
+        """Append unsaved trades to file (call with _file_lock held)"""
+        self._trade_file_lines = await self._save_history(
+            self.trade_history_file, self.trade_history, self._trade_unsaved,
+            self._trade_file_lines, "trade"
+        )
     
     async def _add_trade(self, symbol: str, side: str, entry_price: float, exit_price: float, 
                    size: float, pnl: float, entry_time: Optional[datetime] = None, is_partial: bool = False):
@@ -1326,11 +1499,9 @@ class BotController:
         }
         
         self.trade_history.append(trade)
+        self._trade_unsaved.append(trade)
         
-        if len(self.trade_history) > 1000:
-            self.trade_history = self.trade_history[-1000:]
-        
-        await self._create_background_task(self._save_trade_history_async())
+        await self._mark_history_dirty()
     
     async def _verify_position(self, symbol: str, state: SymbolState):
         """Verify position state matches Bybit reality"""
@@ -1458,22 +1629,48 @@ class BotController:
             logger.debug(f"Error verifying position for {symbol}: {e}")
             self._record_api_failure()
     
-    async def _update_4h_trend(self, symbol: str, state: SymbolState):
-        """Update 4H trend filter using REST API (confirmed candles only)"""
+    def _fresh_klines_array(self, symbol: str, interval: str, limit: int, min_len: int):
+        """
+        WebSocket klines as a chronological (n, 7) array, or None if unusable
+        
+        None when the cache has fewer than min_len candles or its newest candle
+        is older than the previous interval (stream stalled), so the caller
+        falls back to REST.
+        """
+        candles = self.websocket.klines_array(symbol, interval, limit=limit)
+        if len(candles) < min_len:
+            return None
+        interval_ms = int(interval) * 60_000
+        if candles[-1, 0] + 2 * interval_ms <= time.time() * 1000:
+            return None
+        return candles
+    
+    async def _update_4h_trend(self, symbol: str, state: SymbolState, now: Optional[datetime] = None):
+        """
+        Update 4H trend filter from the WebSocket kline cache (REST API fallback)
+        
+        now is the caller's tick time, reused for last_4h_update.
+        """
         try:
-            candles_4h = await self.client.get_klines(
-                symbol=symbol,
-                interval="240",
-                limit=self.config.indicators.ema_period_4h + 50
-            )
-            
-            if not candles_4h or len(candles_4h) < self.config.indicators.ema_period_4h:
-                logger.warning(f"{symbol}: Not enough 4H candles available ({len(candles_4h) if candles_4h else 0})")
-                return
+            limit = self.config.indicators.ema_period_4h + 50
+            candles_4h = self._fresh_klines_array(symbol, "240", limit, self.config.indicators.ema_period_4h)
+            source = "WS"
+            if candles_4h is None:
+                source = "REST"
+                # Parsed once into a chronological float64 array for the indicators
+                candles_4h = await self.client.get_klines_array(
+                    symbol=symbol,
+                    interval="240",
+                    limit=limit
+                )
+                
+                if len(candles_4h) < self.config.indicators.ema_period_4h:
+                    logger.warning(f"{symbol}: Not enough 4H candles available ({len(candles_4h)})")
+                    return
             
             # Validate candle data format
-            most_recent_candle = candles_4h[0]
-            if not isinstance(most_recent_candle, (list, tuple)) or len(most_recent_candle) < 5:
+            most_recent_candle = candles_4h[-1]
+            if len(most_recent_candle) < 5:
                 logger.error(f"{symbol}: Invalid candle format from API")
                 self._record_api_failure()
                 return
@@ -1504,14 +1701,16 @@ class BotController:
                 return
             
             try:
-                ema200 = calculate_ema(candles_4h, self.config.indicators.ema_period_4h)
+                ema200 = calculate_ema_stateful(state.ema_states, "240", candles_4h, self.config.indicators.ema_period_4h)
             except (ValueError, Exception) as e:
                 logger.error(f"{symbol}: Error calculating EMA200: {e}")
                 self._record_api_failure()
                 return
             
             try:
-                st_dir, st_val = calculate_supertrend(
+                st_dir, st_val = calculate_supertrend_incremental(
+                    state.supertrend_states,
+                    "240",
                     candles_4h,
                     self.config.indicators.st_period_4h,
                     self.config.indicators.st_multiplier_4h
@@ -1524,9 +1723,9 @@ class BotController:
             trend = self.trend_filter.detect_trend(close, ema200, st_dir)
             
             async with self._state_lock:
-                state.update_trend_4h(trend, ema200, st_dir, st_val)
+                state.update_trend_4h(trend, ema200, st_dir, st_val, now)
             
-            logger.info(f"[{symbol}] 4H: {trend} (close={close:.2f}, EMA200={ema200:.2f}, ST={st_dir}) [REST]")
+            logger.info(f"[{symbol}] 4H: {trend} (close={close:.2f}, EMA200={ema200:.2f}, ST={st_dir}) [{source}]")
             self._record_api_success()
         
         except Exception as e:
@@ -1555,15 +1754,17 @@ class BotController:
                 return True  # Dacă nu avem trend salvat, permitem entry (nu avem de ce să blocăm)
             
             # Obține lumânările 4H din WebSocket (inclusiv live)
-            candles_4h = await self.websocket.get_klines_chronological(symbol, "240", limit=self.config.indicators.ema_period_4h + 50)
+            candles_4h = self.websocket.klines_array(symbol, "240", limit=self.config.indicators.ema_period_4h + 50)
             
-            if not candles_4h or len(candles_4h) < self.config.indicators.st_period_4h + 1:
+            if len(candles_4h) < self.config.indicators.st_period_4h + 1:
                 logger.debug(f"[{symbol}] Not enough 4H candles from WebSocket for live check, allowing entry")
                 return True  # Dacă nu avem suficiente date, permitem entry (nu blocăm)
             
             # Calculează SuperTrend 4H cu lumânarea live inclusă
             try:
-                st_dir_live, st_val_live = calculate_supertrend(
+                st_dir_live, st_val_live = calculate_supertrend_incremental(
+                    state.supertrend_states,
+                    "240",
                     candles_4h,
                     self.config.indicators.st_period_4h,
                     self.config.indicators.st_multiplier_4h
@@ -1591,21 +1792,22 @@ class BotController:
     async def _update_1h_signal(self, symbol: str, state: SymbolState):
         """Update 1H signal using WebSocket klines (for real-time display)"""
         try:
-            candles_1h = await self.websocket.get_klines(
+            # Numeric array straight from the kline cache (no per-field parsing)
+            candles_1h = self.websocket.klines_array(
                 symbol=symbol,
                 interval="60",
                 limit=100
             )
             
-            if not candles_1h:
+            if len(candles_1h) == 0:
                 logger.debug(f"{symbol}: Fetching 1H candles from REST API (fallback)")
-                candles_1h = await self.client.get_klines(
+                candles_1h = await self.client.get_klines_array(
                     symbol=symbol,
                     interval="60",
                     limit=100
                 )
             
-            if not candles_1h:
+            if candles_1h is None or len(candles_1h) == 0:
                 return
             
             # Validate sufficient data before indicator calculations
@@ -1615,7 +1817,9 @@ class BotController:
                 return
             
             try:
-                st_dir, st_val = calculate_supertrend(
+                st_dir, st_val = calculate_supertrend_incremental(
+                    state.supertrend_states,
+                    "60",
                     candles_1h,
                     self.config.indicators.st_period_1h,
                     self.config.indicators.st_multiplier_1h
@@ -1627,7 +1831,7 @@ class BotController:
             async with self._state_lock:
                 state.update_1h_signal(st_dir, st_val)
             
-            source = "WebSocket" if await self.websocket.has_klines(symbol, "60") else "REST"
+            source = "WebSocket" if self.websocket.has_klines(symbol, "60") else "REST"
             logger.debug(f"[{symbol}] 1H ST: {st_dir} [{source}]")
         
         except Exception as e:
@@ -1641,13 +1845,13 @@ class BotController:
         making entry decisions.
         """
         try:
-            candles_1h = await self.client.get_klines(
+            candles_1h = await self.client.get_klines_array(
                 symbol=symbol,
                 interval="60",
                 limit=100
             )
             
-            if not candles_1h:
+            if len(candles_1h) == 0:
                 logger.warning(f"{symbol}: Cannot fetch confirmed 1H candles from REST API")
                 return
             
@@ -1658,7 +1862,9 @@ class BotController:
                 return
             
             try:
-                st_dir, st_val = calculate_supertrend(
+                st_dir, st_val = calculate_supertrend_incremental(
+                    state.supertrend_states,
+                    "60",
                     candles_1h,
                     self.config.indicators.st_period_1h,
                     self.config.indicators.st_multiplier_1h
@@ -1695,12 +1901,10 @@ class BotController:
             logger.warning(f"[{symbol}] ⚠️ Circuit breaker active, skipping entry")
             return
         
-        # Count total open positions
-        async with self._state_lock:
-            total_open_positions = sum(1 for s in self.states.values() if s.position_side)
-        
-        if total_open_positions >= 8:
-            logger.warning(f"[{symbol}] ⚠️ Maximum positions reached ({total_open_positions}/8), skipping entry check")
+        # Count total open positions (early exit; re-checked under _entry_lock before ordering)
+        total_open_positions = self._count_open_positions()
+        if total_open_positions >= _MAX_OPEN_POSITIONS:
+            logger.warning(f"[{symbol}] ⚠️ Maximum positions reached ({total_open_positions}/{_MAX_OPEN_POSITIONS}), skipping entry check")
             return
         
         if not state.trend_4h or state.trend_4h == "NEUTRAL":
@@ -1776,17 +1980,11 @@ class BotController:
             
             # Check for existing TP order
             open_orders = await self.client.get_open_orders(symbol)
-            tp_orders = [
-                o for o in open_orders 
-                if o.get("reduceOnly") in [True, "true", "True"] and 
-                   o.get("orderType") == "Limit" and
-                   o.get("orderStatus") in ["New", "PartiallyFilled"]
-            ]
+            tp_orders = _open_tp_orders(open_orders)
             
             if tp_orders:
                 logger.debug(f"[{symbol}] TP limit order already exists, skipping")
-                async with self._state_lock:
-                    state.tp_limit_order_id = tp_orders[0].get("orderId")
+                state.tp_limit_order_id = tp_orders[0].get("orderId")
                 return
             
             target_profit = self._calculate_tp_target_profit()
@@ -1872,8 +2070,7 @@ class BotController:
             result = order.get("result", {})
             order_id = result.get("orderId") if result else order.get("orderId")
             if order_id:
-                async with self._state_lock:
-                    state.tp_limit_order_id = order_id
+                state.tp_limit_order_id = order_id
             
             logger.info(f"[{symbol}] ✅ Partial TP limit order placed")
             logger.info(f"         Target price: {target_price:.2f}")
@@ -2085,10 +2282,8 @@ class BotController:
             min_qty = float(lot_size_filter.get("minOrderQty", 0.001))
             max_qty = float(lot_size_filter.get("maxOrderQty", 1000000))
             
-            # Use Decimal for precision
-            qty_decimal = Decimal(str(qty))
-            step_decimal = Decimal(str(qty_step))
-            qty_adjusted = float((qty_decimal // step_decimal) * step_decimal)
+            # Round down on integer step units
+            qty_adjusted = _round_down_to_step(qty, qty_step)
             
             qty_adjusted = max(min_qty, min(qty_adjusted, max_qty))
             
@@ -2112,11 +2307,12 @@ class BotController:
             tick_size = float(price_filter.get("tickSize", 0.01))
             min_price = float(price_filter.get("minPrice", 0))
             max_price = float(price_filter.get("maxPrice", 1000000))
+            self._price_bounds[symbol] = (min_price, max_price)
             
-            # Use Decimal for precision
-            price_decimal = Decimal(str(price))
-            tick_decimal = Decimal(str(tick_size))
-            price_adjusted = float(round(price_decimal / tick_decimal) * tick_decimal)
+            # Round to the nearest tick on integer tick units
+            tick_units, decimals = _step_units(tick_size)
+            scale = 10 ** decimals
+            price_adjusted = round(price * scale / tick_units) * tick_units / scale
             
             price_adjusted = max(min_price, min(price_adjusted, max_price))
             
@@ -2153,10 +2349,7 @@ class BotController:
             time_since_entry = (datetime.now() - state.entry_time).total_seconds()
             min_hold_time = 3600  # 1 hour minimum hold time
             if time_since_entry < min_hold_time:
-                is_opposite_st = (
-                    (state.position_side == "LONG" and state.st_4h_direction == "red") or
-                    (state.position_side == "SHORT" and state.st_4h_direction == "green")
-                )
+                is_opposite_st = state.position_sign * state.st_4h_sign == -1
                 
                 if is_opposite_st:
                     logger.info(f"[{symbol}] Early exit allowed: {state.position_side} position but 4H ST is {state.st_4h_direction}")
@@ -2174,14 +2367,31 @@ class BotController:
             logger.info("=" * 60)
             await self._exit_position(symbol, state)
     
+    def _count_open_positions(self) -> int:
+        """Open positions plus entries placed but not yet recorded in state"""
+        return sum(
+            1 for symbol, s in self.states.items()
+            if s.position_side or symbol in self._pending_entries
+        )
+    
     async def _enter_position(self, symbol: str, side: str, state: SymbolState):
         """Execute entry order"""
+        reserved = False
         try:
             async with self._entry_lock:
                 # Re-check position (may have been opened by another process)
                 if state.position_side:
                     logger.debug(f"[{symbol}] Position already exists ({state.position_side}), skipping entry")
                     return
+                if symbol in self._pending_entries:
+                    logger.debug(f"[{symbol}] Entry already in progress, skipping entry")
+                    return
+                
+                # Symbols are processed concurrently: enforce the cap where entries serialize
+                total_open_positions = self._count_open_positions()
+                if total_open_positions >= _MAX_OPEN_POSITIONS:
+                    logger.warning(f"[{symbol}] ⚠️ Maximum positions reached ({total_open_positions}/{_MAX_OPEN_POSITIONS}), skipping entry")
+                    return
                 
                 # Re-check balance with fresh data
                 await self._update_account_balance()
@@ -2242,6 +2452,10 @@ class BotController:
                     logger.error(f"[{symbol}] Order placement failed: {error_msg}")
                     self._record_api_failure()
                     return
+                
+                # Hold the slot until the position is recorded (released in finally)
+                self._pending_entries.add(symbol)
+                reserved = True
             
             await asyncio.sleep(1)
             
@@ -2282,6 +2496,9 @@ class BotController:
         except Exception as e:
             logger.error(f"Error entering position for {symbol}: {e}", exc_info=True)
             self._record_api_failure()
+        finally:
+            if reserved:
+                self._pending_entries.discard(symbol)
     
     async def _exit_position(self, symbol: str, state: SymbolState):
         """Execute exit order"""
@@ -2385,14 +2602,8 @@ class BotController:
                 status_dict['current_price'] = current_price
                 
                 if state.position_side and state.entry_price:
-                    unrealized_pnl = state.get_unrealized_pnl(current_price)
-                    status_dict['unrealized_pnl'] = unrealized_pnl
-                    
-                    if state.position_side == "LONG":
-                        pnl_percent = ((current_price - state.entry_price) / state.entry_price) * 100
-                    else:
-                        pnl_percent = ((state.entry_price - current_price) / state.entry_price) * 100
-                    status_dict['pnl_percent'] = pnl_percent
+                    status_dict['unrealized_pnl'] = state.get_unrealized_pnl(current_price)
+                    status_dict['pnl_percent'] = state.get_unrealized_pnl_percent(current_price)
             
             symbols_status.append(status_dict)
         
@@ -2425,8 +2636,8 @@ class BotController:
                 "total_equity": self.total_equity,
                 "last_update": self.last_balance_update.isoformat() if self.last_balance_update else None
             },
-            "equity_history": self.equity_history[-100:],
-            "trade_history": self.trade_history[-100:],
+            "equity_history": list(self.equity_history)[-100:],
+            "trade_history": list(self.trade_history)[-100:],
             "symbols": symbols_status
         }
     
@@ -2437,8 +2648,8 @@ class BotController:
             if not state:
                 return {"error": "Symbol not found"}
             
-            candles_4h = await self.websocket.get_klines_chronological(symbol, "240", limit=200)
-            candles_1h = await self.websocket.get_klines_chronological(symbol, "60", limit=200)
+            candles_4h = self.websocket.get_klines_chronological(symbol, "240", limit=200)
+            candles_1h = self.websocket.get_klines_chronological(symbol, "60", limit=200)
             
             ema200_4h = state.ema200_4h if hasattr(state, 'ema200_4h') and state.ema200_4h else None
             st_4h_direction = state.st_4h_direction if hasattr(state, 'st_4h_direction') else None
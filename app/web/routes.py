@@ -73,7 +73,7 @@ async def get_equity_history():
     
     if bot_controller:
         return JSONResponse({
-            "history": bot_controller.equity_history[-500:]  # Last 500 points
+            "history": list(bot_controller.equity_history)[-500:]  # Last 500 points
         })
     return JSONResponse({"history": []})
 
@@ -84,7 +84,7 @@ async def get_trade_history():
     
     if bot_controller:
         return JSONResponse({
-            "trades": bot_controller.trade_history[-500:]  # Last 500 trades
+            "trades": list(bot_controller.trade_history)[-500:]  # Last 500 trades
         })
     return JSONResponse({"trades": []})
 
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
@@ -9,11 +10,18 @@ import uvicorn
 # Load environment variables from .env file
 load_dotenv()
 
-from app.config import config
+from app.config import get_config
 from app.trading.bot_controller import BotController
 from app.web.routes import router
 import app.trading.bot_controller as bot_module
 
+# libuv-based event loop (installed with uvicorn[standard]); Windows falls back to asyncio
+try:
+    import uvloop  # noqa: F401
+    EVENT_LOOP = "uvloop"
+except ImportError:
+    EVENT_LOOP = "asyncio"
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,10 +33,16 @@ logger = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     """Lifespan context manager for FastAPI"""
     # Startup
-    logger.info("Starting Contrarian Pullback Bot...")
+    logger.info(f"Starting Contrarian Pullback Bot... (event loop: {EVENT_LOOP})")
     
-    # Initialize bot
-    bot = BotController()
+    # Initialize bot (config is validated on first load); on a configuration
+    # error the web app still serves, with /api/status reporting no bot
+    try:
+        bot = BotController()
+    except ValueError as e:
+        logger.error(f"❌ Configuration error: {e}")
+        yield
+        return
     bot_module.bot_controller = bot
     
     # Start bot in background
@@ -69,9 +83,17 @@ app = FastAPI(
 app.include_router(router)
 
 if __name__ == "__main__":
+    try:
+        port = get_config().port
+    except ValueError as e:
+        # Reported again by lifespan; keep serving the web app on the configured port
+        logger.error(f"❌ Configuration error: {e}")
+        port = int(os.getenv("PORT", "10000"))
+    
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=config.port,
+        port=port,
+        loop=EVENT_LOOP,
         log_level="info"
     )